@@ -1,148 +1,430 @@
 import heapq
-import numpy as np
-from collections import deque
 import math
+import time
+import numpy as np
 import itertools
+import numbers
+from State import get_board, board_of, as_state
+from Rank import get_index
+from Progress import SearchStats
+from Tree import Tree
+from Solution import Solution
+from Trace import EXPAND, GENERATE, GOAL, BOUND
+from Stream import finish, within_budget
+
+# solve_anytime() starts at this weight and lowers it by ANYTIME_STEP per pass
+ANYTIME_WEIGHT = 3.0
+ANYTIME_STEP = 0.5
 
 class AStar():
-    def __init__(self, matrix, goal):
+    def __init__(self, matrix, goal, size=None, progress=None, record_tree=False, trace=None, budget=None):
         self.cost = 0
         self.path = []
-        self.path_to_goal = []  
+        self.path_to_goal = []
         self.nodes_expanded = 0
         self.depth = 0
         self.matrix = matrix
         self.goal = goal
-        self.explored = set()
+        self.stats = SearchStats(progress, budget)
+        self.record_tree = record_tree
+        self.tree = None  # search tree of the last solve when record_tree is set
+        self.trace = trace  # optional Trace.TraceWriter
+        self.board = get_board(size or len(matrix))
+        self.index = get_index(self.board)
+        self.explored = self.index.new_set()
         self.parent = {}
-        self.counter = itertools.count()  
-    
-    def find_zero(self, current):
-        for i in range(3):
-            for j in range(3):
-                if current[i][j] == 0:
-                    return (i, j)
-    
-    def valid(self, x, y):
-        return 0 <= x < 3 and 0 <= y < 3
-    
-    def get_move_direction(self, zero_before, zero_after):
-        dx = zero_after[0] - zero_before[0]
-        dy = zero_after[1] - zero_before[1]
-        
-        if dx == -1: return "Up"
-        elif dx == 1: return "Down"
-        elif dy == -1: return "Left"
-        elif dy == 1: return "Right"
-        return "Unknown"
-    
-    def reconstruct_path(self, parent, goal_state):
-        path_states = []
-        path_directions = []
-        
-        key = tuple(goal_state.flatten())
-        while key is not None:
-            state = np.array(key).reshape(3, 3)
-            path_states.append(state)
-            key = parent[key]
-        path_states.reverse()
-        
-    
-        for i in range(1, len(path_states)):
-            zero_before = self.find_zero(path_states[i-1])
-            zero_after = self.find_zero(path_states[i])
-            direction = self.get_move_direction(zero_before, zero_after)
-            path_directions.append(direction)
-        
-        return path_states, path_directions
-    
+        # Expanded state with the smallest h and the best anytime solution,
+        # reported if the search runs out of budget
+        self.closest = None
+        self.best = None
+
+    def reconstruct_moves(self, parent, goal_state):
+        moves = bytearray()
+        state = goal_state
+        while parent[state] is not None:
+            moves.append(self.board.move_between(parent[state], state))
+            state = parent[state]
+        moves.reverse()
+        return moves
+
+    def partial(self, last):
+        """Result for a search stopped by its budget: the best solution found
+        so far, else the path to the expanded state closest to the goal"""
+        if self.best is not None:
+            return self.best
+        start = self.board.encode(self.matrix)
+        if self.closest is None:
+            return Solution.unsolved(start, self.stats.expanded)
+        moves = self.reconstruct_moves(self.parent, self.closest)
+        return Solution(start, moves, False, self.stats.expanded)
+
     def AStar_Algorithm(self, heuristic_function):
-        start = np.copy(self.matrix)
-        
-        # Priority queue: (f_cost, counter, state_key, g_cost)
-        # Using state_key (tuple) instead of state (numpy array) to avoid comparison issues
-        open_set = []
-        initial_g = 0
-        initial_f = initial_g + heuristic_function(start, self.goal)
-        start_key = tuple(start.flatten())
-        heapq.heappush(open_set, (initial_f, next(self.counter), start_key, initial_g))
-        
-        g_costs = {}  # g(n) costs (always increases by 1 per move)
-        parent = {}
-        in_open_set = set()  # Track what's currently in open set
-        
-        g_costs[start_key] = initial_g
-        parent[start_key] = None
-        in_open_set.add(start_key)
-        
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        
-        while open_set:
-            current_f, _, current_key, current_g = heapq.heappop(open_set)
-            in_open_set.discard(current_key)
-            
-            if current_g > g_costs.get(current_key, float('inf')):
-                continue
-            
-            current = np.array(current_key).reshape(3, 3)
-            
-            self.explored.add(current_key)
-            self.nodes_expanded += 1
-            
-            if np.array_equal(current, self.goal):
-                self.path, self.path_to_goal = self.reconstruct_path(parent, self.goal)
-                self.cost = current_g 
-                self.depth = current_g
-                return self.path, self.cost, self.nodes_expanded, self.depth, self.path_to_goal
-            
-            x, y = self.find_zero(current)
-            
-            for dx, dy in directions:
-                new_x = x + dx
-                new_y = y + dy
-                
-                if self.valid(new_x, new_y):
-                    child = np.copy(current)
-                    child[x, y], child[new_x, new_y] = child[new_x, new_y], child[x, y]
-                    child_key = tuple(child.flatten())
-        
-                    if child_key in self.explored:
-                        continue
+        """Older interface: (path, cost, nodes_expanded, depth, path_to_goal)"""
+        solution = self.solve(heuristic_function)
+        self.path, self.cost, self.nodes_expanded, self.depth, self.path_to_goal = solution.as_tuple()
+        return self.path, self.cost, self.nodes_expanded, self.depth, self.path_to_goal
+
+    def solve(self, heuristic_function, weight=1):
+        """Run stream() to the end"""
+        return finish(self.stream(heuristic_function, weight))
+
+    def solve_anytime(self, heuristic_function, weight=ANYTIME_WEIGHT, step=ANYTIME_STEP,
+                      time_limit=None, on_solution=None):
+        """Run stream_anytime() to the end"""
+        return finish(self.stream_anytime(heuristic_function, weight, step, time_limit, on_solution))
+
+    @within_budget
+    def stream(self, heuristic_function, weight=1):
+        """A* on f = g + weight * h. With a consistent h and weight w > 1 the
+        answer costs at most w times the optimum, usually after far fewer
+        expansions."""
+        board, key_of = self.board, self.index.key
+        start = board.encode(self.matrix)
+        goal = board.encode(self.goal)
+
+        initial_h = weight * heuristic_function(start, goal)
+        open_list = open_list_for(initial_h)
+        open_list.push(start, initial_h, 0)
+        g_costs = {start: 0}  # g(n) costs (always increases by 1 per move)
+        parent = self.parent = {start: None}
+        explored = self.explored = self.index.new_set()
+        self.closest, self.best = start, None
+        closest_h = initial_h
+        stats = self.stats
+        tree = self.tree = Tree(start) if self.record_tree else None
+        trace = self.trace
+        if trace is not None:
+            trace.begin(start, goal)
+
+        while open_list:
+            current, current_f, current_g = open_list.pop()
+            explored.add(key_of(current))
+
+            if trace is not None:
+                trace.record(GOAL if current == goal else EXPAND, current, parent[current],
+                             current_g, current_f - current_g)
+            if current == goal:
+                yield Solution(start, self.reconstruct_moves(parent, goal), True, stats.expanded)
+                return
+
+            if current_f - current_g < closest_h:
+                self.closest, closest_h = current, current_f - current_g
+            stats.frontier, stats.closed = len(open_list), len(g_costs)
+            stats.depth, stats.bound = current_g, current_f
+            stats.tick()
+            yield current
+            for child, move in board.children(current):
+                stats.generated += 1
+                if key_of(child) in explored:
+                    stats.duplicates += 1
+                    continue
+
+                new_g = current_g + 1
+
+                if child not in g_costs or new_g < g_costs[child]:
+                    g_costs[child] = new_g
+                    parent[child] = current
+                    if tree is not None:
+                        # A cheaper path re-parents the child
+                        tree.add(current, child, move)
 
+                    h_cost = weight * heuristic_function(child, goal)
+                    open_list.push(child, new_g + h_cost, new_g)
+                    if trace is not None:
+                        trace.record(GENERATE, child, current, new_g, h_cost)
+                else:
+                    stats.duplicates += 1
+
+        yield Solution.unsolved(start, stats.expanded)
+
+    @within_budget
+    def stream_anytime(self, heuristic_function, weight=ANYTIME_WEIGHT, step=ANYTIME_STEP,
+                       time_limit=None, on_solution=None):
+        """Anytime repairing A* (ARA*): weighted A* passes with a falling weight.
+
+        Each pass reuses the previous one's g values. States improved after
+        they were closed wait in an INCONS list and are only reopened for
+        the next pass. After every pass the best path so far is passed to
+        on_solution(solution, bound). Its cost is at most `bound` times the
+        optimum. The bound is min(weight, cost / lower bound), where the
+        lower bound is min(g + h) over the open and INCONS states.
+        self.bound keeps the latest one. The search stops once a pass at
+        weight 1 proves the answer optimal, or once time_limit seconds
+        have passed and a solution is in hand. It returns the best Solution.
+        """
+        board, key_of = self.board, self.index.key
+        start = board.encode(self.matrix)
+        goal = board.encode(self.goal)
+        stats = self.stats
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        trace = self.trace
+        if trace is not None:
+            trace.begin(start, goal)
+
+        h_values = {}
+
+        def h(state):
+            value = h_values.get(state)
+            if value is None:
+                value = h_values[state] = heuristic_function(state, goal)
+            return value
+
+        epsilon = weight
+        g_costs = {start: 0}
+        parent = self.parent = {start: None}
+        self.closest, self.best = start, None
+        closest_h = h(start)
+        open_list = open_list_for(epsilon * h(start))
+        open_list.push(start, epsilon * h(start), 0)
+        closed = self.index.new_set()
+        incons = set()
+        best = None
+        self.bound = None
+
+        while True:
+            stats.bound = epsilon
+            if trace is not None:
+                trace.record(BOUND, start, None, 0, epsilon)
+            timed_out = False
+            # Expand until no open state could lead to a cheaper goal at this weight
+            while open_list and (goal not in g_costs or g_costs[goal] > open_list.min_f()):
+                if best is not None and deadline is not None and time.perf_counter() > deadline:
+                    timed_out = True
+                    break
+                current, current_f, current_g = open_list.pop()
+                closed.add(key_of(current))
+                if trace is not None:
+                    trace.record(EXPAND, current, parent[current], current_g, current_f - current_g)
+                if h(current) < closest_h:
+                    self.closest, closest_h = current, h(current)
+                stats.frontier, stats.closed, stats.depth = len(open_list), len(g_costs), current_g
+                stats.tick()
+                yield current
+                for child, move in board.children(current):
+                    stats.generated += 1
                     new_g = current_g + 1
+                    if child in g_costs and new_g >= g_costs[child]:
+                        stats.duplicates += 1
+                        continue
+                    g_costs[child] = new_g
+                    parent[child] = current
+                    if key_of(child) in closed:
+                        incons.add(child)
+                    else:
+                        open_list.push(child, new_g + epsilon * h(child), new_g)
+                        if trace is not None:
+                            trace.record(GENERATE, child, current, new_g, epsilon * h(child))
+
+            if timed_out or goal not in g_costs:
+                break
+            cost = g_costs[goal]
+            if best is None or cost < best.cost:
+                best = self.best = Solution(start, self.reconstruct_moves(parent, goal), True, stats.expanded)
+                if trace is not None:
+                    trace.record(GOAL, goal, parent[goal], cost)
+            lower = min((g_costs[state] + h(state) for state in itertools.chain(open_list, incons)), default=cost)
+            self.bound = max(1, min(epsilon, cost / lower)) if lower > 0 else 1
+            if on_solution is not None:
+                on_solution(best, self.bound)
+            if epsilon <= 1 or self.bound == 1:
+                break
+
+            # Next pass: lower the weight, reopen INCONS and re-key OPEN
+            epsilon = max(1, epsilon - step)
+            waiting = list(itertools.chain(open_list, incons))
+            open_list = open_list_for(epsilon * h(start))
+            for state in waiting:
+                open_list.push(state, g_costs[state] + epsilon * h(state), g_costs[state])
+            incons = set()
+            closed = self.index.new_set()
+
+        yield best or Solution.unsolved(start, stats.expanded)
+
+
+class HeapQueue():
+    """Binary-heap open list for any f.
+
+    A state pushed again with a cheaper g leaves its old entry in the heap;
+    pop() skips entries that no longer match the state's latest g. Equal f
+    values come out in push order.
+    """
+    def __init__(self):
+        self.heap = []  # (f, counter, state, g)
+        self.g = {}  # latest g per open state
+        self.counter = itertools.count()
+
+    def __len__(self):
+        return len(self.g)
+
+    def __contains__(self, state):
+        return state in self.g
 
-                    if child_key not in g_costs or new_g < g_costs[child_key]:
-                        g_costs[child_key] = new_g
-                        parent[child_key] = current_key
+    def __iter__(self):
+        return iter(self.g)
 
-                        h_cost = heuristic_function(child, self.goal)
-                        f_cost = new_g + h_cost
-                        
-                        heapq.heappush(open_set, (f_cost, next(self.counter), child_key, new_g))
-                        in_open_set.add(child_key)
-        
-        return [], 0, self.nodes_expanded, 0, []
+    def push(self, state, f, g):
+        self.g[state] = g
+        heapq.heappush(self.heap, (f, next(self.counter), state, g))
+
+    def pop(self):
+        """Remove and return (state, f, g) with the smallest f"""
+        while True:
+            f, _, state, g = heapq.heappop(self.heap)
+            if self.g.get(state) == g:
+                del self.g[state]
+                return state, f, g
+
+    def min_f(self):
+        heap = self.heap
+        while self.g.get(heap[0][2]) != heap[0][3]:
+            heapq.heappop(heap)
+        return heap[0][0]
+
+
+class BucketQueue():
+    """Open list for integer f, with O(1) push and amortized O(1) pop.
+
+    buckets[f][g] is a dict used as a LIFO stack of states (popitem() takes
+    the newest). A state pushed again with a cheaper g is moved out of its
+    old bucket, so no stale entries pile up. Within one f the largest g
+    comes out first, which favours states closer to the goal.
+    """
+    def __init__(self):
+        self.buckets = []
+        self.where = {}  # (f, g) per open state
+        self.lowest = 0  # no open state has a smaller f
+
+    def __len__(self):
+        return len(self.where)
+
+    def __contains__(self, state):
+        return state in self.where
+
+    def __iter__(self):
+        return iter(self.where)
+
+    def push(self, state, f, g):
+        old = self.where.get(state)
+        if old is not None:
+            del self.buckets[old[0]][old[1]][state]
+        buckets = self.buckets
+        while len(buckets) <= f:
+            buckets.append([])
+        row = buckets[f]
+        while len(row) <= g:
+            row.append({})
+        row[g][state] = None
+        self.where[state] = (f, g)
+        if f < self.lowest:
+            self.lowest = f
+
+    def pop(self):
+        """Remove and return (state, f, g) with the smallest f, then largest g"""
+        row = self.buckets[self.min_f()]
+        g = len(row) - 1
+        state, _ = row[g].popitem()
+        del self.where[state]
+        return state, self.lowest, g
+
+    def min_f(self):
+        if not self.where:
+            raise IndexError("empty BucketQueue")
+        buckets = self.buckets
+        f = self.lowest
+        while True:
+            row = buckets[f]
+            # Trailing empty g buckets are dropped, so the last one has states
+            while row and not row[-1]:
+                row.pop()
+            if row:
+                self.lowest = f
+                return f
+            f += 1
+
+
+def open_list_for(h):
+    """BucketQueue when the heuristic yields integers (Manhattan, PDB, exact
+    distance), else a HeapQueue"""
+    return BucketQueue() if isinstance(h, numbers.Integral) else HeapQueue()
+
+
+# Cost of a tile sitting (di, dj) away from its goal cell
+METRICS = {
+    "manhattan": lambda di, dj: abs(di) + abs(dj),
+    "euclidean": lambda di, dj: math.sqrt(di * di + dj * dj),
+}
+
+
+class HeuristicTable():
+    """Heuristic for one goal, precomputed as a tile x cell cost matrix.
+
+    Scoring a packed state reads its cells two at a time through tables
+    indexed by the pair's bits; batch() scores an (N, cells) array of tile
+    values in a single vectorized gather.
+    """
+    def __init__(self, goal, metric):
+        goal = as_state(goal)
+        board = board_of(goal)
+        size, cells = board.size, board.cells
+        positions = [0] * cells
+        for i, value in enumerate(board.tiles(goal)):
+            positions[value] = i
+
+        tile_cost = METRICS[metric]
+        costs = [[0] * cells for _ in range(cells)]  # costs[tile][cell], blank is free
+        for value in range(1, cells):
+            goal_i, goal_j = divmod(positions[value], size)
+            for pos in range(cells):
+                costs[value][pos] = tile_cost(pos // size - goal_i, pos % size - goal_j)
+        self.cost = np.array(costs)
+
+        def cell_cost(value, pos):
+            return costs[value][pos] if value < cells and pos < cells else 0
+
+        bits, mask = board.bits, board.mask
+        self.pair_mask = (1 << (2 * bits)) - 1
+        self.pair_shifts = tuple(range(0, bits * cells, 2 * bits))
+        self.pair_costs = tuple(
+            tuple(cell_cost(p & mask, 2 * k) + cell_cost(p >> bits, 2 * k + 1) for p in range(1 << (2 * bits)))
+            for k in range(len(self.pair_shifts))
+        )
+
+    def __call__(self, state):
+        pair_mask = self.pair_mask
+        return sum(table[(state >> shift) & pair_mask]
+                   for table, shift in zip(self.pair_costs, self.pair_shifts))
+
+    def batch(self, states):
+        cells = self.cost.shape[0]
+        states = np.asarray(states).reshape(-1, cells)
+        return self.cost[states, np.arange(cells)].sum(axis=1)
+
+
+_heuristic_tables = {}
+
+
+def heuristic_table(goal, metric):
+    """Shared HeuristicTable, built the first time a (goal, metric) is seen"""
+    key = (metric, as_state(goal))
+    table = _heuristic_tables.get(key)
+    if table is None:
+        table = _heuristic_tables[key] = HeuristicTable(goal, metric)
+    return table
 
 
 def manhattan_distance(state, goal):
-    distance = 0
-    for i in range(3):
-        for j in range(3):
-            if state[i][j] != 0: 
-                value = state[i][j]    
-                goal_positions = np.where(goal == value)
-                goal_i, goal_j = goal_positions[0][0], goal_positions[1][0]
-                distance += abs(i - goal_i) + abs(j - goal_j)
-    return distance
+    return heuristic_table(goal, "manhattan")(as_state(state))
 
 
 def euclidean_distance(state, goal):
-    distance = 0
-    for i in range(3):
-        for j in range(3):
-            if state[i][j] != 0:
-                value = state[i][j]
-                goal_positions = np.where(goal == value)
-                goal_i, goal_j = goal_positions[0][0], goal_positions[1][0]
-                distance += math.sqrt((i - goal_i)**2 + (j - goal_j)**2)
-    return distance
+    return heuristic_table(goal, "euclidean")(as_state(state))
+
+
+def manhattan_distance_batch(states, goal):
+    """Manhattan distance for every row of an (N, cells) array of boards"""
+    return heuristic_table(goal, "manhattan").batch(states)
+
+
+def euclidean_distance_batch(states, goal):
+    """Euclidean distance for every row of an (N, cells) array of boards"""
+    return heuristic_table(goal, "euclidean").batch(states)
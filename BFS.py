@@ -1,93 +1,374 @@
 from collections import deque
-from Tree import Tree 
 import numpy as np
+from Tree import Tree
+from State import get_board, inverse
+from Rank import get_index
+from Progress import SearchStats
+from Solution import Solution
+from Trace import EXPAND, GENERATE, GOAL
+from Stream import finish, within_budget
 
 class BFS():
-    def __init__(self, matrix, goal):
+    def __init__(self, matrix, goal, size=None, progress=None, record_tree=False, trace=None, budget=None):
         self.cost = 0
         self.path = []
-        self.path_to_goal = []  
+        self.path_to_goal = []
         self.nodes_expanded = 0
         self.depth = 0
         self.matrix = matrix
         self.goal = goal
-        self.explored = set()
+        self.stats = SearchStats(progress, budget)
+        self.record_tree = record_tree
+        self.tree = None  # search tree of the last solve when record_tree is set
+        self.trace = trace  # optional Trace.TraceWriter
+        self.board = get_board(size or len(matrix))
+        self.index = get_index(self.board)
+        self.explored = self.index.new_set()
         self.parent = {}
-    
-    def find_zero(self, current):
-        for i in range(3):
-            for j in range(3):
-                if current[i][j] == 0:
-                    return (i, j)
-    
-    def valid(self, x, y):
-        return 0 <= x < 3 and 0 <= y < 3
-    
-    def get_move_name(self, dx, dy):
-        if dx == -1 and dy == 0:
-            return "Up"
-        elif dx == 1 and dy == 0:
-            return "Down"
-        elif dx == 0 and dy == -1:
-            return "Left"
-        elif dx == 0 and dy == 1:
-            return "Right"
-        return None
-    
-    def reconstruct_path(self, parent, move_parent, goal_state):
-        path = []
-        moves = []
-        key = tuple(goal_state.flatten())    
-        while key is not None:
-            state = np.array(key).reshape(3, 3)
-            path.append(state)
-            if key in move_parent:
-                moves.append(move_parent[key])
-            key = parent[key]    
-        path.reverse()
+        self.move_parent = None  # incoming moves of the last stream(), for partial()
+
+    def reconstruct_moves(self, move_parent, start_state, goal_state):
+        # The parent of a state is implied by undoing its incoming move
+        board, key = self.board, self.index.key
+        moves = bytearray()
+        state = goal_state
+        while state != start_state:
+            move = move_parent[key(state)]
+            moves.append(move)
+            state = board.apply_move(state, inverse(move))
         moves.reverse()
-        return path, moves
-    
+        return moves
+
+    def partial(self, last):
+        """Result for a search stopped by its budget: the path to the last
+        state expanded, which only stream() can recover"""
+        start = self.board.encode(self.matrix)
+        if last is None or self.move_parent is None:
+            return Solution.unsolved(start, self.stats.expanded, self.stats.depth)
+        moves = self.reconstruct_moves(self.move_parent, start, last)
+        return Solution(start, moves, False, self.stats.expanded)
+
+    def adopt(self, solution):
+        """Fill the older result attributes from a Solution"""
+        self.path, self.cost, self.nodes_expanded, self.depth, self.path_to_goal = solution.as_tuple()
+        return self.path, self.cost, self.nodes_expanded, self.depth
+
     def BFS_Algorithm(self):
-        start = np.copy(self.matrix)
+        return self.adopt(self.solve())
+
+    def Bidirectional_BFS_Algorithm(self):
+        return self.adopt(self.solve_bidirectional())
+
+    def solve(self):
+        return finish(self.stream())
+
+    def solve_bidirectional(self):
+        return finish(self.stream_bidirectional())
+
+    def solve_layered(self):
+        return finish(self.stream_layered())
+
+    @within_budget
+    def stream(self):
+        board, key_of = self.board, self.index.key
+        start = board.encode(self.matrix)
+        goal = board.encode(self.goal)
         q = deque()
-        q.append((start, 0))  
-        visited = set()
-        visited.add(tuple(start.flatten()))  
-        parent = {}
-        parent[tuple(start.flatten())] = None
-        move_parent = {} 
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        
+        q.append((start, 0))
+        # A fresh set per call, so the same BFS can be solved again
+        visited = self.explored = self.index.new_set()
+        visited.add(key_of(start))
+        move_parent = self.move_parent = self.index.new_array()  # incoming move per state
+        stats = self.stats
+        tree = self.tree = Tree(start) if self.record_tree else None
+        trace = self.trace
+        if trace is not None:
+            trace.begin(start, goal)
+            # Parents of queued states, so expansions are traced without ranking
+            traced_parent = {}
+
         while q:
             current, current_depth = q.popleft()
-            
-            if np.array_equal(current, self.goal):
-                self.path, self.path_to_goal = self.reconstruct_path(parent, move_parent, self.goal)
-                self.cost = len(self.path) - 1  
-                self.depth = current_depth
-                return self.path, self.cost, self.nodes_expanded, self.depth
-            
-            x, y = self.find_zero(current)    
-            
-            for dx, dy in directions:
-                new_x = x + dx 
-                new_y = y + dy
-                
-                if self.valid(new_x, new_y):
-                    child = np.copy(current)
-                    child[x, y], child[new_x, new_y] = child[new_x, new_y], child[x, y]
-                    key = tuple(child.flatten())
-                    
-                    if key not in visited:
-                        visited.add(key)
-                        self.explored.add(key)
-                        q.append((child, current_depth + 1))  
-                        parent[key] = tuple(current.flatten())
-                        move_parent[key] = self.get_move_name(dx, dy)  
-                        self.nodes_expanded+=1
-        
-        return [], 0, self.nodes_expanded, 0
+
+            if trace is not None:
+                trace.record(GOAL if current == goal else EXPAND, current, traced_parent.pop(current, None),
+                             current_depth)
+            if current == goal:
+                yield Solution(start, self.reconstruct_moves(move_parent, start, goal), True, stats.expanded)
+                return
+
+            stats.frontier, stats.closed, stats.depth = len(q), len(visited), current_depth
+            stats.tick()
+            yield current
+            for child, move in board.children(current):
+                stats.generated += 1
+                key = key_of(child)
+                if key not in visited:
+                    visited.add(key)
+                    q.append((child, current_depth + 1))
+                    move_parent[key] = move
+                    if tree is not None:
+                        tree.add(current, child, move)
+                    if trace is not None:
+                        trace.record(GENERATE, child, current, current_depth + 1)
+                        traced_parent[child] = current
+                else:
+                    stats.duplicates += 1
+
+        yield Solution.unsolved(start, stats.expanded)
+
+    @within_budget
+    def stream_bidirectional(self):
+        """BFS from both ends, expanding the smaller layer until they meet"""
+        board, index = self.board, self.index
+        key_of = index.key
+        self.move_parent = None
+        start = board.encode(self.matrix)
+        goal = board.encode(self.goal)
+        # Traced g counts moves from whichever end the state was reached from
+        trace = self.trace
+        if trace is not None:
+            trace.begin(start, goal)
+        if start == goal:
+            if trace is not None:
+                trace.record(GOAL, start)
+            yield Solution(start)
+            return
+        if not board.solvable(start, goal):
+            # Different components: ranks would alias across the two searches
+            yield Solution.unsolved(start)
+            return
+
+        # Per side and state: depth + 1 (0 = unseen), and the move recorded
+        # on discovery. Forward moves lead away from start, backward moves
+        # lead toward goal.
+        forward_depth = index.new_array()
+        backward_depth = index.new_array()
+        forward_move = index.new_array()
+        backward_move = index.new_array()
+        forward_depth[key_of(start)] = 1
+        backward_depth[key_of(goal)] = 1
+        forward_layer, backward_layer = [start], [goal]
+        best, meet = None, None
+        stats = self.stats
+        # Layers completed on each side; together they bound the path length
+        forward_done, backward_done = 0, 0
+        stats.closed = 2
+
+        while forward_layer and backward_layer and best is None:
+            forward = len(forward_layer) <= len(backward_layer)
+            if forward:
+                layer, seen, other, moves = forward_layer, forward_depth, backward_depth, forward_move
+            else:
+                layer, seen, other, moves = backward_layer, backward_depth, forward_depth, backward_move
+
+            next_layer = []
+            remaining = len(forward_layer) + len(backward_layer)
+            stats.depth = forward_done if forward else backward_done
+            stats.bound = forward_done + backward_done
+            for current in layer:
+                remaining -= 1
+                stats.frontier = remaining + len(next_layer)
+                stats.tick()
+                yield current
+                depth = seen[key_of(current)]
+                if trace is not None:
+                    parent = None
+                    if depth > 1:
+                        back = moves[key_of(current)]
+                        parent = board.apply_move(current, inverse(back) if forward else back)
+                    trace.record(EXPAND, current, parent, depth - 1)
+                for child, move in board.children(current):
+                    stats.generated += 1
+                    key = key_of(child)
+                    if seen[key]:
+                        stats.duplicates += 1
+                        continue
+                    seen[key] = depth + 1
+                    stats.closed += 1
+                    moves[key] = move if forward else inverse(move)
+                    next_layer.append(child)
+                    if trace is not None:
+                        trace.record(GENERATE, child, current, depth)
+                    if other[key]:
+                        length = depth + other[key] - 1
+                        if best is None or length < best:
+                            best, meet = length, child
+
+            if forward:
+                forward_layer = next_layer
+                forward_done += 1
+            else:
+                backward_layer = next_layer
+                backward_done += 1
+
+        if best is None:
+            yield Solution.unsolved(start, stats.expanded)
+            return
+
+        if trace is not None:
+            trace.record(GOAL, meet, None, best)
+        moves = self.reconstruct_moves(forward_move, start, meet)
+        state = meet
+        while state != goal:
+            move = backward_move[key_of(state)]
+            state = board.apply_move(state, move)
+            moves.append(move)
+        yield Solution(start, moves, True, stats.expanded)
+
+    @within_budget
+    def stream_layered(self):
+        """Level-synchronous BFS on NumPy arrays of states (see Layer below).
+
+        Every layer is kept so the path can be walked back from the goal,
+        which costs 9 bytes per state for the whole component at worst.
+        """
+        board, stats = self.board, self.stats
+        self.move_parent = None
+        start = board.encode(self.matrix)
+        goal = board.encode(self.goal)
+        if not board.solvable(start, goal):
+            # Same answer a full enumeration would give, without running it
+            yield Solution.unsolved(start)
+            return
+
+        layers = [Layer.of(board, start)]
+        previous = Layer.empty()
+        stats.frontier = stats.closed = 1
+        while not layers[-1].contains(board, goal):
+            layer = layers[-1]
+            if stats.budget is not None:
+                stats.budget.check(stats, every=1)
+            following, generated = layer.expand(board, previous)
+            stats.expanded += len(layer)
+            stats.generated += generated
+            stats.duplicates += generated - len(following)
+            stats.depth, stats.frontier = len(layers) - 1, len(following)
+            stats.closed += len(following)
+            if stats.progress is not None:
+                stats.progress(stats)
+            yield None
+            if not len(following):
+                yield Solution.unsolved(start, stats.expanded, len(layers) - 1)
+                return
+            previous = layer
+            layers.append(following)
+
+        # Each state on the path has a neighbour one layer closer to start
+        moves = bytearray()
+        state = goal
+        for layer in reversed(layers[:-1]):
+            for child, move in board.children(state):
+                if layer.contains(board, child):
+                    moves.append(inverse(move))
+                    state = child
+                    break
+        moves.reverse()
+        yield Solution(start, moves, True, stats.expanded)
+
+
+# Level-synchronous BFS keeps a whole layer as two arrays: the packed cell
+# bits of each state (uint64, so boards up to 4x4) and its blank index.
+# The cell bits alone identify a state, so a layer is deduplicated by
+# sorting them. Every move moves the blank to a cell of the other colour
+# on a checkerboard, so the move graph is bipartite and a state's
+# neighbours sit only in the layers just before and after its own. The
+# next layer is therefore the new children minus the previous layer, and
+# no visited set is needed.
+
+
+class Layer():
+    """One BFS layer: sorted unique cell bits and the matching blank cells"""
+    __slots__ = ("cells", "blanks")
+
+    def __init__(self, cells, blanks):
+        self.cells = cells
+        self.blanks = blanks
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.uint8))
+
+    @classmethod
+    def of(cls, board, state):
+        if board.blank_shift > 64:
+            raise ValueError(f"Layered BFS handles boards up to 4x4, not {board.size}x{board.size}")
+        return cls(np.array([state & board.cell_mask], dtype=np.uint64),
+                   np.array([board.blank(state)], dtype=np.uint8))
+
+    def __len__(self):
+        return len(self.cells)
+
+    def contains(self, board, state):
+        key = np.uint64(state & board.cell_mask)
+        i = np.searchsorted(self.cells, key)
+        return i < len(self.cells) and self.cells[i] == key
+
+    def expand(self, board, previous):
+        """The next layer, and how many children were generated to build it"""
+        targets = layer_targets(board)
+        mask = np.uint64(board.mask)
+        child_cells, child_blanks = [], []
+        for move_targets in targets:
+            target = move_targets[self.blanks]
+            legal = target >= 0
+            cells, target = self.cells[legal], target[legal]
+            target_shift = target.astype(np.uint64) * np.uint64(board.bits)
+            blank_shift = self.blanks[legal].astype(np.uint64) * np.uint64(board.bits)
+            # The tile at target slides into the blank's (zero) field
+            tile = (cells >> target_shift) & mask
+            child_cells.append(cells - (tile << target_shift) + (tile << blank_shift))
+            child_blanks.append(target.astype(np.uint8))
+        cells = np.concatenate(child_cells)
+        blanks = np.concatenate(child_blanks)
+        generated = len(cells)
+
+        cells, first = np.unique(cells, return_index=True)
+        blanks = blanks[first]
+        if len(previous):
+            i = np.minimum(np.searchsorted(previous.cells, cells), len(previous) - 1)
+            new = previous.cells[i] != cells
+            cells, blanks = cells[new], blanks[new]
+        return Layer(cells, blanks), generated
+
+
+_layer_targets = {}
+
+
+def layer_targets(board):
+    """Per move, an array mapping blank cell -> new blank cell, -1 if illegal"""
+    targets = _layer_targets.get(board.size)
+    if targets is None:
+        targets = np.full((4, board.cells), -1, dtype=np.int16)
+        for blank, row in enumerate(board.moves):
+            for target, move, *_ in row:
+                targets[move, blank] = target
+        targets = _layer_targets[board.size] = tuple(targets)
+    return targets
 
 
+def layer_sizes(matrix, max_depth=None, progress=None):
+    """Number of states at each distance from a board, layer by layer.
 
+    Only two layers are held at a time, so the whole 8-puzzle takes well
+    under a second and 15-puzzle depth is limited by the memory of its two
+    widest layers.
+    """
+    board = get_board(len(matrix))
+    stats = SearchStats(progress)
+    stats.start()
+    layer, previous = Layer.of(board, board.encode(matrix)), Layer.empty()
+    sizes = [1]
+    while max_depth is None or len(sizes) <= max_depth:
+        following, generated = layer.expand(board, previous)
+        if not len(following):
+            break
+        stats.expanded += len(layer)
+        stats.generated += generated
+        stats.duplicates += generated - len(following)
+        stats.depth, stats.frontier = len(sizes), len(following)
+        if progress is not None:
+            progress(stats)
+        sizes.append(len(following))
+        layer, previous = following, layer
+    return sizes
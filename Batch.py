@@ -0,0 +1,164 @@
+import os
+import sys
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from Solvers import SOLVERS
+from State import get_board
+
+
+def default_goal(size):
+    """1 .. n*n-1 in reading order with the blank last"""
+    return np.array(list(range(1, size * size)) + [0]).reshape(size, size)
+
+
+def parse_puzzle(line):
+    """A board written as n*n integers separated by spaces and/or commas"""
+    values = [int(v) for v in line.replace(",", " ").split()]
+    size = int(round(len(values) ** 0.5))
+    if size * size != len(values) or sorted(values) != list(range(size * size)):
+        raise ValueError(f"Not a square permutation of 0..n*n-1: {line.strip()!r}")
+    return np.array(values).reshape(size, size)
+
+
+def read_puzzles(lines):
+    """Yield puzzle lines from an iterable of lines, skipping blanks and #
+    comments. solve_batch() parses them one at a time, so a malformed line
+    becomes an error result instead of ending the batch."""
+    for line in lines:
+        line = line.split("#", 1)[0].strip()
+        if line:
+            yield line
+
+
+def puzzle_tiles(puzzle, goal_tiles):
+    """Flat tile list of a board or puzzle line, checked against the goal's size"""
+    if not isinstance(puzzle, str):
+        puzzle = " ".join(str(v) for v in np.asarray(puzzle).flatten())
+    tiles = [int(v) for v in parse_puzzle(puzzle).flatten()]
+    if goal_tiles is not None and len(tiles) != len(goal_tiles):
+        size, goal_size = int(round(len(tiles) ** 0.5)), int(round(len(goal_tiles) ** 0.5))
+        raise ValueError(f"Puzzle is {size}x{size} but the goal is {goal_size}x{goal_size}")
+    return tiles
+
+
+def job_boards(tiles, goal_tiles):
+    size = int(round(len(tiles) ** 0.5))
+    matrix = np.array(tiles).reshape(size, size)
+    goal = default_goal(size) if goal_tiles is None else np.array(goal_tiles).reshape(size, size)
+    return matrix, goal
+
+
+def solve_one(job):
+    """Worker entry point: solve one puzzle and report it as a plain dict"""
+    index, tiles, algorithm, goal_tiles, budget = job
+    start_time = time.perf_counter()
+    try:
+        matrix, goal = job_boards(tiles, goal_tiles)
+        board = get_board(len(matrix))
+        if not board.solvable(board.encode(matrix), board.encode(goal)):
+            raise ValueError("Puzzle cannot reach the goal")
+        solution = SOLVERS[algorithm](matrix, goal, budget=budget)
+    except Exception as e:
+        solution = None
+        error = str(e)
+    elapsed = time.perf_counter() - start_time
+
+    if solution is None:
+        return {"index": index, "puzzle": list(tiles), "algorithm": algorithm, "solved": False,
+                "error": error, "time": elapsed}
+    result = {
+        "index": index,
+        "puzzle": list(tiles),
+        "algorithm": algorithm,
+        "solved": solution.solved,
+        "cost": solution.cost,
+        "nodes_expanded": solution.nodes_expanded,
+        "depth": solution.depth,
+        "moves": solution.move_names(),
+        "time": elapsed,
+    }
+    if solution.exceeded is not None:
+        result["exceeded"] = solution.exceeded
+    return result
+
+
+def solve_chunk(jobs):
+    return [solve_one(job) for job in jobs]
+
+
+def solve_batch(puzzles, algorithm="astar-manhattan", goal=None, workers=None, chunksize=8, window=None,
+                cache=None, budget=None):
+    """Solve puzzles across a process pool, yielding result dicts in input order.
+
+    Puzzles are boards or lines of n*n integers (see read_puzzles()). One
+    that cannot be parsed or does not match the goal's size yields an
+    {"index", "puzzle", "error"} result and the batch carries on.
+
+    Puzzles travel to the workers `chunksize` at a time to amortize the
+    pickling round-trip, and at most `window` chunks are in flight, so an
+    unbounded input stream is consumed lazily and results start flowing
+    immediately. With a SolutionCache, hits are answered here without a
+    worker (marked "cached": true) and fresh results are stored as they
+    stream out; only this process touches the cache. A Progress.Budget
+    applies to each puzzle; results that ran out of it carry "exceeded" and
+    are not cached.
+    """
+    if algorithm not in SOLVERS:
+        raise ValueError(f"Unknown algorithm {algorithm!r}; choose from {', '.join(SOLVERS)}")
+    workers = workers or os.cpu_count() or 1
+    window = window or workers * 4
+    goal_tiles = None if goal is None else [int(v) for v in np.asarray(goal).flatten()]
+
+    def collect(entry):
+        # A pending entry is a worker future or a list of cache hits
+        if isinstance(entry, list):
+            return entry
+        results = entry.result()
+        if cache is not None:
+            for result in results:
+                if "error" not in result and "exceeded" not in result:
+                    cache.put(*job_boards(result["puzzle"], goal_tiles), algorithm, result)
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        chunk = []
+        for index, puzzle in enumerate(puzzles):
+            try:
+                tiles = puzzle_tiles(puzzle, goal_tiles)
+            except ValueError as e:
+                if chunk:
+                    pending.append(executor.submit(solve_chunk, chunk))
+                    chunk = []
+                raw = puzzle if isinstance(puzzle, str) else np.asarray(puzzle).flatten().tolist()
+                pending.append([dict(index=index, puzzle=raw, algorithm=algorithm, solved=False, error=str(e))])
+                continue
+            record = None if cache is None else cache.get(*job_boards(tiles, goal_tiles), algorithm)
+            if record is not None:
+                # Flush the misses queued so far to keep results in input order
+                if chunk:
+                    pending.append(executor.submit(solve_chunk, chunk))
+                    chunk = []
+                pending.append([dict(index=index, puzzle=tiles, algorithm=algorithm, **record, cached=True)])
+            else:
+                chunk.append((index, tiles, algorithm, goal_tiles, budget))
+            if len(chunk) == chunksize:
+                pending.append(executor.submit(solve_chunk, chunk))
+                chunk = []
+            if len(pending) >= window:
+                yield from collect(pending.popleft())
+        if chunk:
+            pending.append(executor.submit(solve_chunk, chunk))
+        while pending:
+            yield from collect(pending.popleft())
+
+
+def write_results(results, out=None):
+    """Stream results as JSON lines"""
+    out = out or sys.stdout
+    for result in results:
+        out.write(json.dumps(result) + "\n")
+        out.flush()
@@ -0,0 +1,237 @@
+import csv
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+import numpy as np
+import DistanceTable
+from Batch import default_goal
+from Solvers import SOLVERS
+from Progress import Budget
+from Canonical import canonical
+from Rank import get_index
+from State import get_board
+
+# Reproducible 8-puzzle benchmark. The corpus is drawn from the goal's
+# distance table, so every instance's optimal depth is known up front and
+# the buckets 0..31 can be filled exactly instead of by rejection sampling.
+
+DEFAULT_ALGORITHMS = ("bfs", "dfs", "ids", "astar-manhattan", "astar-euclidean")
+MAX_DEPTH = 31
+# Seconds a single run may take before it is recorded as timed out. The
+# uninformed searches need far longer than this on the deepest instances.
+TIME_LIMIT = 5.0
+# A measurement is matched across reports by algorithm and puzzle, so
+# baselines stay comparable when the corpus options change
+KEY_FIELDS = ("algorithm", "puzzle")
+# Timing differences below this many seconds are treated as noise
+MIN_TIME_DELTA = 0.005
+# CSV columns
+FIELDS = ("algorithm", "instance", "depth", "puzzle", "cost", "optimal", "timed_out", "nodes_expanded",
+          "trials", "time_min", "time_median", "peak_memory")
+
+
+def build_corpus(per_depth=2, depths=range(MAX_DEPTH + 1), seed=0, goal=None):
+    """[(depth, puzzle)] with `per_depth` random instances per optimal depth.
+
+    Instances come from the seeded RNG over the table's ranks, so the same
+    seed always gives the same corpus. Depths with fewer states than
+    `per_depth` contribute all they have.
+    """
+    goal = default_goal(3) if goal is None else goal
+    # Sample from the canonical goal's table, the one the solvers use
+    mapping = canonical(goal)
+    table = DistanceTable.load(mapping.goal)
+    board, index = table.board, table.index
+    entries = np.frombuffer(table.table, dtype=np.uint8)
+    distances = np.where(entries == DistanceTable.UNREACHED, -1, entries & DistanceTable.DIST_MASK)
+
+    rng = random.Random(seed)
+    corpus = []
+    for depth in depths:
+        ranks = np.flatnonzero(distances == depth).tolist()
+        for r in rng.sample(ranks, min(per_depth, len(ranks))):
+            state = mapping.from_canonical(index.unrank(r, table.parity))
+            corpus.append((depth, board.decode(state)))
+    return corpus
+
+
+def measure(algorithm, puzzle, goal, trials=3, memory=True, time_limit=TIME_LIMIT):
+    """Time `trials` untraced runs, then one more under tracemalloc for peak memory.
+
+    Each run stops after `time_limit` seconds (None for no limit). The
+    first run that does is recorded with timed_out set and no cost, and
+    the instance is not run again.
+    """
+    solve = SOLVERS[algorithm]
+    budget = None if time_limit is None else Budget(time_limit=time_limit)
+    times = []
+    for _ in range(trials):
+        start = time.perf_counter()
+        solution = solve(puzzle, goal, budget=budget)
+        times.append(time.perf_counter() - start)
+        if solution.exceeded is not None:
+            break
+    timed_out = solution.exceeded is not None
+
+    peak = 0
+    if memory and not timed_out:
+        # tracemalloc slows allocation-heavy searches several times over,
+        # so the traced run is never one of the timed ones. It runs without
+        # the time limit, which the slowdown could otherwise trip.
+        tracemalloc.start()
+        try:
+            solve(puzzle, goal)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {"cost": None if timed_out else solution.cost, "timed_out": timed_out,
+            "nodes_expanded": solution.nodes_expanded, "time_min": min(times),
+            "time_median": statistics.median(times), "peak_memory": peak}
+
+
+def run_benchmark(algorithms=DEFAULT_ALGORITHMS, per_depth=2, depths=range(MAX_DEPTH + 1), seed=0,
+                  trials=3, memory=True, log=None, time_limit=TIME_LIMIT):
+    """Run every algorithm on the seeded corpus and return a results document"""
+    goal = default_goal(3)
+    corpus = build_corpus(per_depth, depths, seed, goal)
+    # Build lazily loaded tables before anything is timed
+    DistanceTable.load(canonical(goal).goal)
+    get_index(get_board(3))
+
+    results = []
+    for algorithm in algorithms:
+        if algorithm not in SOLVERS:
+            raise ValueError(f"Unknown algorithm {algorithm!r}; choose from {', '.join(SOLVERS)}")
+        for instance, (depth, puzzle) in enumerate(corpus):
+            row = {"algorithm": algorithm, "instance": instance, "depth": depth,
+                   "puzzle": " ".join(str(v) for v in puzzle.flatten()), "trials": trials}
+            row.update(measure(algorithm, puzzle, goal, trials, memory, time_limit))
+            row["optimal"] = row["cost"] == depth
+            results.append(row)
+            if log is not None:
+                cost = "timed out" if row["timed_out"] else f"cost {row['cost']:>5}"
+                log.write(f"{algorithm:>18} #{instance:<3} depth {depth:>2}  {cost:>10}  "
+                          f"{row['time_median'] * 1000:9.2f} ms  {row['peak_memory'] / 1024:9.0f} KiB\n")
+                log.flush()
+
+    return {
+        "meta": {
+            "seed": seed,
+            "per_depth": per_depth,
+            "depths": list(depths),
+            "trials": trials,
+            "memory": memory,
+            "time_limit": time_limit,
+            "algorithms": list(algorithms),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def save(report, path):
+    """Write a report as JSON, or as CSV rows when the path ends in .csv"""
+    if path.endswith(".csv"):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            for row in report["results"]:
+                writer.writerow({field: row[field] for field in FIELDS})
+    else:
+        with open(path, "w") as f:
+            json.dump(report, f, indent=1)
+
+
+def load(path):
+    """Read a report written by save(); CSV reports come back without meta"""
+    if path.endswith(".csv"):
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        for row in rows:
+            for field in ("instance", "depth", "nodes_expanded", "trials", "peak_memory"):
+                row[field] = int(row[field])
+            for field in ("time_min", "time_median"):
+                row[field] = float(row[field])
+            row["cost"] = int(row["cost"]) if row["cost"] else None
+            for field in ("optimal", "timed_out"):
+                row[field] = row.get(field) == "True"
+        return {"meta": {}, "results": rows}
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline, current, threshold=0.10):
+    """Per-algorithm totals against a baseline report.
+
+    Returns (lines, regressions). An algorithm regresses when its total
+    best-of-trials time (by at least MIN_TIME_DELTA) or its peak memory
+    grows by more than `threshold`, when it returns a different cost or
+    expands a different number of nodes on any shared instance (the
+    searches are deterministic), or when it times out where the baseline
+    did not. Memory is skipped when either report ran without tracing.
+    """
+    old = {tuple(row[k] for k in KEY_FIELDS): row for row in baseline["results"]}
+    lines = []
+    regressions = []
+    for algorithm in dict.fromkeys(row["algorithm"] for row in current["results"]):
+        pairs = [(old[key], row) for row in current["results"] if row["algorithm"] == algorithm
+                 for key in [tuple(row[k] for k in KEY_FIELDS)] if key in old]
+        if not pairs:
+            lines.append(f"{algorithm}: not in baseline")
+            continue
+        old_time = sum(before["time_min"] for before, _ in pairs)
+        new_time = sum(after["time_min"] for _, after in pairs)
+        old_peak = max(before["peak_memory"] for before, _ in pairs)
+        new_peak = max(after["peak_memory"] for _, after in pairs)
+        time_change = new_time / old_time - 1 if old_time else 0.0
+        peak_change = new_peak / old_peak - 1 if old_peak else 0.0
+        problems = []
+        if time_change > threshold and new_time - old_time > MIN_TIME_DELTA:
+            problems.append(f"time +{time_change:.0%}")
+        if old_peak and new_peak and peak_change > threshold:
+            problems.append(f"peak memory +{peak_change:.0%}")
+        # Older reports have no timed_out field
+        finished = [(before, after) for before, after in pairs
+                    if not before.get("timed_out") and not after["timed_out"]]
+        changed = [after["instance"] for before, after in finished
+                   if before["cost"] != after["cost"] or before["nodes_expanded"] != after["nodes_expanded"]]
+        if changed:
+            problems.append(f"cost or nodes expanded changed on instances {changed}")
+        timed_out = [after["instance"] for before, after in pairs
+                     if after["timed_out"] and not before.get("timed_out")]
+        if timed_out:
+            problems.append(f"timed out on instances {timed_out}")
+        lines.append(f"{algorithm}: time {old_time:.4f}s -> {new_time:.4f}s ({time_change:+.1%}), "
+                     f"peak {old_peak / 1024:.0f} -> {new_peak / 1024:.0f} KiB ({peak_change:+.1%})"
+                     + (f"  REGRESSION: {'; '.join(problems)}" if problems else ""))
+        if problems:
+            regressions.append(algorithm)
+    return lines, regressions
+
+
+def main(args):
+    """Entry point for `main.py bench`; returns the process exit code"""
+    depths = range(args.min_depth, args.max_depth + 1)
+    report = run_benchmark(args.algorithms, args.per_depth, depths, args.seed, args.trials,
+                           memory=not args.no_memory, log=None if args.quiet else sys.stderr,
+                           time_limit=args.time_limit or None)
+    if args.output:
+        save(report, args.output)
+    if args.compare:
+        if not os.path.exists(args.compare):
+            print(f"No baseline at {args.compare}", file=sys.stderr)
+            return 2
+        lines, regressions = compare(load(args.compare), report, args.threshold)
+        print("\n".join(lines))
+        return 1 if regressions else 0
+    if not args.output:
+        json.dump(report, sys.stdout, indent=1)
+        print()
+    return 0
@@ -0,0 +1,99 @@
+from State import as_state, board_of, MOVE_NAMES, DIRECTIONS
+from Solution import Solution
+
+# Every goal is solved through a canonical one. A symmetry of the square
+# (rotation or reflection) first carries the goal's blank to the lowest
+# cell of its orbit, then tiles are relabelled so the transformed goal
+# reads 1, 2, 3, ... around the blank. Both steps are automorphisms of the
+# move graph, so distances, reachability and optimality carry over, and
+# the tables and caches built for the canonical goal serve every goal
+# whose blank lands on the same cell. For the usual goals (blank in a
+# corner) that is the single goal 0, 1, ..., n*n-1.
+
+
+def symmetries(size):
+    """The 8 symmetries of a size x size grid as (row, col) -> (row, col)"""
+    last = size - 1
+    return (
+        lambda r, c: (r, c),
+        lambda r, c: (c, last - r),
+        lambda r, c: (last - r, last - c),
+        lambda r, c: (last - c, r),
+        lambda r, c: (r, last - c),
+        lambda r, c: (last - r, c),
+        lambda r, c: (c, r),
+        lambda r, c: (last - c, last - r),
+    )
+
+
+class Canonical():
+    """Maps states and moves between one goal's frame and its canonical goal's"""
+    def __init__(self, goal):
+        goal = as_state(goal)
+        board = self.board = board_of(goal)
+        size, cells = board.size, board.cells
+
+        # Symmetry that sends the goal's blank to the smallest cell it can reach
+        blank_row, blank_col = divmod(board.blank(goal), size)
+        transform = min(symmetries(size), key=lambda t: t(blank_row, blank_col))
+        self.cell_map = tuple(r * size + c for r, c in (transform(*divmod(i, size)) for i in range(cells)))
+        # The transform is affine, so a blank step (dx, dy) maps to the
+        # difference of the images of (dx, dy) and the origin
+        origin = transform(0, 0)
+        self.move_map = tuple(
+            DIRECTIONS.index(tuple(a - b for a, b in zip(transform(dx, dy), origin)))
+            for dx, dy in DIRECTIONS
+        )
+        self.move_unmap = tuple(self.move_map.index(move) for move in range(len(MOVE_NAMES)))
+
+        blank = self.cell_map[board.blank(goal)]
+        canonical_tiles = [0] * cells
+        tile = 1
+        for i in range(cells):
+            if i != blank:
+                canonical_tiles[i] = tile
+                tile += 1
+        self.goal = board.encode(canonical_tiles)
+
+        tile_map = [0] * cells
+        for pos, value in enumerate(board.tiles(goal)):
+            tile_map[value] = canonical_tiles[self.cell_map[pos]]
+        self.tile_map = tuple(tile_map)
+        self.tile_unmap = tuple(tile_map.index(value) for value in range(cells))
+        self.cell_unmap = tuple(self.cell_map.index(i) for i in range(cells))
+
+    def to_canonical(self, state):
+        tiles = [0] * self.board.cells
+        for pos, value in enumerate(self.board.tiles(as_state(state))):
+            tiles[self.cell_map[pos]] = self.tile_map[value]
+        return self.board.encode(tiles)
+
+    def from_canonical(self, state):
+        tiles = [0] * self.board.cells
+        for pos, value in enumerate(self.board.tiles(state)):
+            tiles[self.cell_unmap[pos]] = self.tile_unmap[value]
+        return self.board.encode(tiles)
+
+    def moves_to_canonical(self, moves):
+        return [MOVE_NAMES[self.move_map[MOVE_NAMES.index(name)]] for name in moves]
+
+    def moves_from_canonical(self, moves):
+        return [MOVE_NAMES[self.move_unmap[MOVE_NAMES.index(name)]] for name in moves]
+
+    def solution_from_canonical(self, solution):
+        """Map a Solution found for the canonical goal back to this goal's frame"""
+        moves = bytes(self.move_unmap[move] for move in solution.moves)
+        return Solution(self.from_canonical(solution.start), moves, solution.solved,
+                        solution.nodes_expanded, solution.depth, solution.exceeded)
+
+
+_canonical = {}
+
+
+def canonical(goal):
+    """Shared Canonical for a goal, built on first use"""
+    goal = as_state(goal)
+    mapping = _canonical.get(goal)
+    if mapping is None:
+        mapping = _canonical[goal] = Canonical(goal)
+    return mapping
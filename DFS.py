@@ -1,120 +1,113 @@
-from collections import deque
-import numpy as np
+from State import get_board, inverse, UP, DOWN, LEFT, RIGHT
+from Rank import get_index
+from Progress import SearchStats
+from Tree import Tree
+from Solution import Solution
+from Trace import EXPAND, GENERATE, GOAL
+from Stream import finish, within_budget
+
+# Neighbours are generated in the original solver's order, which decides
+# the path DFS finds and how many states it expands
+NEIGHBOUR_ORDER = (UP, LEFT, DOWN, RIGHT)
 
 class DFS():
-    def __init__(self, matrix, goal):
+    def __init__(self, matrix, goal, size=None, progress=None, record_tree=False, trace=None, budget=None):
         self.Cost = 0
         self.Path = []
         self.depth = 0
         self.matrix = matrix
         self.goal = goal
-        self.explored = set()
-        self.expanded_nodes = set()
-        self.parent = {}
+        self.stats = SearchStats(progress, budget)
+        self.record_tree = record_tree
+        self.tree = None  # search tree of the last solve when record_tree is set
+        self.trace = trace  # optional Trace.TraceWriter
+        self.board = get_board(size or len(matrix))
+        self.index = get_index(self.board)
+        self.children = self.board.ordered_children(NEIGHBOUR_ORDER)
+        # One uint32 per state rank: (depth + 1) << 2 | incoming move, 0 for
+        # states not yet discovered. The parent is implied by undoing the
+        # move, so this is the only per-state bookkeeping DFS keeps.
+        self.discovered = self.index.new_array("I")
         self.moves = []
-        self.depth_tracker = {}
-    
-    def matrix_to_tuple(self, matrix):
-        return tuple(map(tuple, matrix))
-    
+
     def get_neighbors(self, Current_State):
-        neighbors = []
-        Row, Col = np.where(Current_State == 0)
-        Row, Col = Row[0], Col[0]
-        
-        if Row != 0:
-            new_State = Current_State.copy()
-            new_State[Row][Col], new_State[Row-1][Col] = new_State[Row-1][Col], new_State[Row][Col]
-            neighbors.append(new_State)
-        
-        if Col != 0:
-            new_State = Current_State.copy()
-            new_State[Row][Col], new_State[Row][Col-1] = new_State[Row][Col-1], new_State[Row][Col]
-            neighbors.append(new_State)
-        
-        if Row != 2:
-            new_State = Current_State.copy()
-            new_State[Row][Col], new_State[Row+1][Col] = new_State[Row+1][Col], new_State[Row][Col]
-            neighbors.append(new_State)
-        
-        if Col != 2:
-            new_State = Current_State.copy()
-            new_State[Row][Col], new_State[Row][Col+1] = new_State[Row][Col+1], new_State[Row][Col]
-            neighbors.append(new_State)
-        
-        return neighbors
-    
-    def get_move_direction(self, state1, state2):
-        """Determine which direction the blank moved"""
-        pos1 = np.where(state1 == 0)
-        pos2 = np.where(state2 == 0)
-        row1, col1 = pos1[0][0], pos1[1][0]
-        row2, col2 = pos2[0][0], pos2[1][0]
-        
-        if row2 < row1:
-            return "Up"
-        elif row2 > row1:
-            return "Down"
-        elif col2 < col1:
-            return "Left"
-        elif col2 > col1:
-            return "Right"
-        return ""
-    
+        return [child for child, _ in self.children(Current_State)]
+
     def DFS_Algorithm(self):
-        DFS_deque = deque([self.matrix])
-        initial_tuple = self.matrix_to_tuple(self.matrix)
-        self.parent[initial_tuple] = None
-        self.depth_tracker[initial_tuple] = 0
-        self.expanded_nodes.add(initial_tuple) 
-        
+        """Older interface: 1 or 0, with Path, Cost, moves and depth filled in"""
+        solution = self.solve()
+        self.Path, self.Cost, _, self.depth, self.moves = solution.as_tuple()
+        return 1 if solution.solved else 0
+
+    def solve(self):
+        return finish(self.stream())
+
+    @within_budget
+    def stream(self):
+        board, key_of = self.board, self.index.key
+        discovered = self.discovered
+        initial_state = board.encode(self.matrix)
+        goal_state = board.encode(self.goal)
+        # Every state is pushed at most once, on discovery
+        DFS_stack = [initial_state]
+        discovered[key_of(initial_state)] = 1 << 2
+
         max_depth = 0
-        
-        while len(DFS_deque) > 0:
-            Current_State = DFS_deque.pop()
-            Current_State_as_tuple = self.matrix_to_tuple(Current_State)
-            
-            if Current_State_as_tuple in self.explored:
-                continue
-                
-            self.explored.add(Current_State_as_tuple)
-            
-            current_depth = self.depth_tracker[Current_State_as_tuple]
+        stats = self.stats
+        tree = self.tree = Tree(initial_state) if self.record_tree else None
+        trace = self.trace
+        if trace is not None:
+            trace.begin(initial_state, goal_state)
+
+        while DFS_stack:
+            Current_State = DFS_stack.pop()
+            current_entry = discovered[key_of(Current_State)]
+            current_depth = (current_entry >> 2) - 1
             max_depth = max(max_depth, current_depth)
-            
-            if np.array_equal(Current_State, self.goal):
-                self.create_path(Current_State_as_tuple)
-                self.depth = max_depth
-                self.Cost = len(self.Path) - 1
-                return 1
-            
-            neighbors = self.get_neighbors(Current_State)
-            
-            for neighbor in neighbors:
-                new_tuple = self.matrix_to_tuple(neighbor)
-                
-                if new_tuple not in self.explored:
-                    if new_tuple not in self.parent:
-                        self.parent[new_tuple] = Current_State_as_tuple
-                        self.depth_tracker[new_tuple] = current_depth + 1
-                        self.expanded_nodes.add(new_tuple) 
-                        DFS_deque.append(neighbor)
-        
-        self.depth = max_depth
-        return 0
-    
-    def create_path(self, tuple_value):
-        path = []
-        Current_State = tuple_value
-        while Current_State is not None:
-            path.append(np.array(Current_State))
-            Current_State = self.parent[Current_State]
-        
-        self.Path = path[::-1]
-        
-        self.moves = []
-        for i in range(len(self.Path) - 1):
-            move = self.get_move_direction(self.Path[i], self.Path[i+1])
-            self.moves.append(move)
 
+            if trace is not None:
+                parent = board.apply_move(Current_State, inverse(current_entry & 3)) if current_depth else None
+                trace.record(GOAL if Current_State == goal_state else EXPAND, Current_State, parent, current_depth)
+            if Current_State == goal_state:
+                moves = self.create_moves(Current_State, initial_state)
+                yield Solution(initial_state, moves, True, stats.expanded, max_depth)
+                return
+
+            stats.frontier, stats.depth = len(DFS_stack), current_depth
+            stats.tick()
+            yield Current_State
+            entry = (current_depth + 2) << 2
+            for neighbor, move in self.children(Current_State):
+                stats.generated += 1
+                neighbor_key = key_of(neighbor)
+                if discovered[neighbor_key]:
+                    stats.duplicates += 1
+                    continue
+                discovered[neighbor_key] = entry | move
+                stats.closed += 1
+                DFS_stack.append(neighbor)
+                if tree is not None:
+                    tree.add(Current_State, neighbor, move)
+                if trace is not None:
+                    trace.record(GENERATE, neighbor, Current_State, current_depth + 1)
+
+        yield Solution.unsolved(initial_state, stats.expanded, max_depth)
+
+    def partial(self, last):
+        """Result for a search stopped by its budget: the path to the last
+        state expanded"""
+        initial_state = self.board.encode(self.matrix)
+        if last is None:
+            return Solution.unsolved(initial_state, self.stats.expanded)
+        moves = self.create_moves(last, initial_state)
+        return Solution(initial_state, moves, False, self.stats.expanded)
 
+    def create_moves(self, state, initial_state):
+        board, key_of = self.board, self.index.key
+        moves = bytearray()
+        while state != initial_state:
+            move = self.discovered[key_of(state)] & 3
+            moves.append(move)
+            state = board.apply_move(state, inverse(move))
+        moves.reverse()
+        return moves
@@ -0,0 +1,137 @@
+import os
+import mmap
+import tempfile
+from collections import deque
+from State import as_state, board_of, inverse
+from Rank import get_index
+from Solution import Solution
+from Progress import CHECK_INTERVAL
+
+TABLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tables")
+
+# One byte per rank: optimal distance to the goal in the low 5 bits (the
+# 8-puzzle diameter is 31) and the move that starts an optimal path in the
+# next two. UNREACHED marks ranks outside the goal's component.
+DIST_MASK = 0x1F
+MOVE_SHIFT = 5
+UNREACHED = 0xFF
+
+
+def write_table(path, data):
+    """Write a finished table to path in one step. Each process writes its
+    own temporary file and renames it into place, so processes building the
+    same table at once never see or clobber a partial file."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            os.fchmod(f.fileno(), 0o644)  # mkstemp makes it private
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class DistanceTable():
+    """Optimal distance and best move for every state, for one goal.
+
+    Built once by a retrograde BFS from the goal and memory-mapped on later
+    runs, so a query is a walk of O(solution length) lookups. A build calls
+    check() every CHECK_INTERVAL states, which may raise to abandon it.
+    """
+    def __init__(self, goal, path=None, check=None):
+        self.goal = as_state(goal)
+        self.board = board_of(self.goal)
+        self.index = get_index(self.board)
+        if not self.index.dense:
+            raise ValueError(f"No distance table for {self.board.size}x{self.board.size} boards: "
+                             f"{self.index.states} states is too many to store")
+        self.parity = self.board.parity(self.goal)
+        self.path = path or os.path.join(TABLE_DIR, f"distance_{self.goal:x}.bin")
+        if not os.path.exists(self.path) or os.path.getsize(self.path) != self.index.states:
+            self.build(check)
+        with open(self.path, "rb") as f:
+            self.table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def build(self, check=None):
+        board, rank = self.board, self.index.rank
+        table = bytearray([UNREACHED]) * self.index.states
+        table[rank(self.goal)] = 0
+        q = deque([(self.goal, 0)])
+        visited = 0
+        while q:
+            current, dist = q.popleft()
+            visited += 1
+            if check is not None and visited % CHECK_INTERVAL == 0:
+                check()
+            for child, move in board.children(current):
+                key = rank(child)
+                if table[key] == UNREACHED:
+                    # The child gets back to current by undoing the move
+                    table[key] = (dist + 1) | (inverse(move) << MOVE_SHIFT)
+                    q.append((child, dist + 1))
+
+        write_table(self.path, table)
+
+    def lookup(self, state):
+        # Ranks are only unique within one parity class, and the table
+        # holds the goal's class
+        if self.board.parity(state) != self.parity:
+            return UNREACHED
+        return self.table[self.index.rank(state)]
+
+    def distance(self, state):
+        """Optimal number of moves to the goal, or None if unreachable"""
+        entry = self.lookup(as_state(state))
+        if entry == UNREACHED:
+            return None
+        return entry & DIST_MASK
+
+    def best_move(self, state):
+        entry = self.lookup(as_state(state))
+        if entry == UNREACHED or entry == 0:
+            return None
+        return entry >> MOVE_SHIFT
+
+    def solve(self, matrix):
+        """Same (path, cost, nodes_expanded, depth, path_to_goal) tuple as AStar"""
+        return self.solution(matrix).as_tuple()
+
+    def solution(self, matrix):
+        """Optimal Solution by following best moves; nothing is expanded"""
+        start = state = as_state(matrix)
+        entry = self.lookup(state)
+        if entry == UNREACHED:
+            return Solution.unsolved(start)
+
+        board, rank = self.board, self.index.rank
+        moves = bytearray()
+        while entry & DIST_MASK:
+            move = entry >> MOVE_SHIFT
+            state = board.apply_move(state, move)
+            moves.append(move)
+            entry = self.table[rank(state)]
+        return Solution(start, moves)
+
+    def close(self):
+        self.table.close()
+
+
+_tables = {}
+
+
+def load(goal, check=None):
+    """Shared DistanceTable for a goal, built on first use (see DistanceTable
+    for check)"""
+    goal = as_state(goal)
+    if goal not in _tables:
+        _tables[goal] = DistanceTable(goal, check=check)
+    return _tables[goal]
+
+
+def exact_distance(state, goal):
+    """Perfect heuristic for AStar_Algorithm, read from the goal's table"""
+    distance = load(goal).distance(state)
+    return float('inf') if distance is None else distance
@@ -4,18 +4,83 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QGridLayout, QPushButton, QLabel, 
                              QComboBox, QTextEdit, QGroupBox, QMessageBox,
                              QFrame, QSlider, QSpinBox)
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+from PyQt5.QtCore import Qt, QTimer, QObject, QThread, pyqtSignal
 from PyQt5.QtGui import QFont, QPalette, QColor, QLinearGradient, QPainter
 import time
-from BFS import BFS
-from DFS import DFS
-from IDS import IDS
-from ASTAR import AStar , manhattan_distance , euclidean_distance
+from State import get_board, inverse
+from Solvers import SOLVERS
+from Solution import Solution
+from Progress import SearchCancelled
+from SolutionCache import SolutionCache, record_of, replay
 # Import your algorithms here
 # from IterativeDFS import IterativeDFS
 # from AStar import AStar, manhattan_distance, euclidean_distance
 
 
+# Combo box entry -> Solvers.SOLVERS name
+ALGORITHMS = {
+    "BFS": "bfs",
+    "Bidirectional BFS": "bidirectional-bfs",
+    "BFS (Vectorized)": "layered-bfs",
+    "DFS": "dfs",
+    "Iterative DFS": "ids",
+    "A* (Manhattan)": "astar-manhattan",
+    "A* (Euclidean)": "astar-euclidean",
+    "A* (Exact Table)": "astar-exact",
+    "A* (Pattern DB)": "astar-pdb",
+    "Weighted A* (Manhattan)": "wastar-manhattan",
+    "ARA* (Manhattan)": "arastar-manhattan",
+    "Parallel A* (Manhattan)": "hdastar-manhattan",
+    "IDA* (Manhattan)": "idastar-manhattan",
+    "IDA* (Euclidean)": "idastar-euclidean",
+    "IDA* (Pattern DB)": "idastar-pdb",
+    "Distance Table": "table",
+}
+
+
+class SolveWorker(QObject):
+    """Runs one solve on a background QThread and reports through signals"""
+    progress = pyqtSignal(object)  # SearchStats.as_dict() snapshot
+    finished = pyqtSignal(object, float, bool)  # Solution, elapsed, cached
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, algorithm, initial_state, goal, cache=None):
+        super().__init__()
+        self.algorithm = algorithm
+        self.initial_state = initial_state
+        self.goal = goal
+        self.cache = cache
+        self.cancel_requested = False
+        self.start_time = 0.0
+
+    def report(self, stats):
+        # Called from inside the solver loop on the worker thread
+        if self.cancel_requested:
+            raise SearchCancelled()
+        self.progress.emit(stats.as_dict())
+
+    def run(self):
+        self.start_time = time.perf_counter()
+        name = ALGORITHMS[self.algorithm]
+        try:
+            record = None if self.cache is None else self.cache.get(self.initial_state, self.goal, name)
+            if record is not None:
+                # Report the time of the run that produced the cached result
+                self.finished.emit(replay(self.initial_state, record), record["time"], True)
+                return
+            solution = SOLVERS[name](self.initial_state, self.goal, progress=self.report)
+            elapsed = time.perf_counter() - self.start_time
+            if self.cache is not None:
+                self.cache.put(self.initial_state, self.goal, name, record_of(solution, elapsed))
+        except SearchCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit(solution, elapsed, False)
+
+
 class GradientFrame(QFrame):
     """A frame with gradient background"""
     def __init__(self, color1="#1a1a2e", color2="#16213e", color3="#0f3460", parent=None):
@@ -42,11 +107,12 @@ class ModernButton(QPushButton):
 
 
 class PuzzleBoard(QFrame):
-    """Widget to display the 8-puzzle board"""
-    def __init__(self):
+    """Widget to display a size x size puzzle board"""
+    def __init__(self, size=3):
         super().__init__()
         self.setFrameStyle(QFrame.Box | QFrame.Raised)
         self.setLineWidth(2)
+        self.size = size
         self.init_ui()
         
     def init_ui(self):
@@ -54,26 +120,38 @@ class PuzzleBoard(QFrame):
         self.layout.setSpacing(5)
         self.layout.setContentsMargins(10, 10, 10, 10)
         self.tiles = []
-        
-        # Create 3x3 grid of tiles
-        for i in range(3):
+        self.build_tiles()
+        self.setLayout(self.layout)
+
+    def build_tiles(self):
+        # Keep the board roughly the same width whatever the size
+        tile_size = 240 // self.size
+        for i in range(self.size):
             row = []
-            for j in range(3):
+            for j in range(self.size):
                 tile = QPushButton("")
-                tile.setMinimumSize(80, 80)
-                tile.setMaximumSize(80, 80)
-                tile.setFont(QFont('Arial', 20, QFont.Bold))
+                tile.setMinimumSize(tile_size, tile_size)
+                tile.setMaximumSize(tile_size, tile_size)
+                tile.setFont(QFont('Arial', 60 // self.size, QFont.Bold))
                 tile.setEnabled(False)
                 self.layout.addWidget(tile, i, j)
                 row.append(tile)
             self.tiles.append(row)
-        
-        self.setLayout(self.layout)
+
+    def set_size(self, size):
+        """Rebuild the grid for a new board width"""
+        for row in self.tiles:
+            for tile in row:
+                self.layout.removeWidget(tile)
+                tile.deleteLater()
+        self.tiles = []
+        self.size = size
+        self.build_tiles()
     
     def set_state(self, state):
         """Update the board with a new state"""
-        for i in range(3):
-            for j in range(3):
+        for i in range(self.size):
+            for j in range(self.size):
                 value = int(state[i][j])
                 if value == 0:
                     self.tiles[i][j].setText("")
@@ -109,9 +187,13 @@ class MainWindow(QMainWindow):
         self.setGeometry(100, 100, 1200, 700)
         
         # Solution data
-        self.path = []
+        self.board_size = 3
+        self.solution = []
         self.path_to_goal = []
         self.current_step = 0
+        self.solve_thread = None
+        self.worker = None
+        self.cache = SolutionCache()
         self.timer = QTimer()
         self.timer.timeout.connect(self.show_next_step)
         
@@ -149,26 +231,27 @@ class MainWindow(QMainWindow):
         init_group = QGroupBox("Initial State")
         init_layout = QVBoxLayout()
         init_layout.setSpacing(10)
-        
-        self.init_board = PuzzleBoard()
+
+        # Board size
+        size_layout = QHBoxLayout()
+        size_layout.addWidget(QLabel("Board Size:"))
+        self.size_spin = QSpinBox()
+        self.size_spin.setRange(2, 5)
+        self.size_spin.setValue(self.board_size)
+        self.size_spin.valueChanged.connect(self.set_board_size)
+        size_layout.addWidget(self.size_spin)
+        init_layout.addLayout(size_layout)
+        
+        self.init_board = PuzzleBoard(self.board_size)
         init_layout.addWidget(self.init_board)
         
         # Manual input buttons
-        input_layout = QGridLayout()
-        input_layout.setSpacing(5)
+        self.input_layout = QGridLayout()
+        self.input_layout.setSpacing(5)
         self.input_tiles = []
-        for i in range(3):
-            row = []
-            for j in range(3):
-                btn = ModernButton("0")
-                btn.setMinimumSize(45, 45)
-                btn.setFont(QFont('Arial', 12, QFont.Bold))
-                btn.clicked.connect(lambda checked, x=i, y=j: self.cycle_tile(x, y))
-                input_layout.addWidget(btn, i, j)
-                row.append(btn)
-            self.input_tiles.append(row)
+        self.build_input_tiles()
         
-        init_layout.addLayout(input_layout)
+        init_layout.addLayout(self.input_layout)
         
         # Button layout
         button_layout = QHBoxLayout()
@@ -190,7 +273,7 @@ class MainWindow(QMainWindow):
         algo_layout = QVBoxLayout()
         
         self.algo_combo = QComboBox()
-        self.algo_combo.addItems(["BFS", "DFS", "Iterative DFS", "A* (Manhattan)", "A* (Euclidean)"])
+        self.algo_combo.addItems(list(ALGORITHMS))
         algo_layout.addWidget(QLabel("Select Algorithm:"))
         algo_layout.addWidget(self.algo_combo)
         
@@ -215,7 +298,7 @@ class MainWindow(QMainWindow):
         layout.setSpacing(15)
         
         # Current state display
-        self.current_board = PuzzleBoard()
+        self.current_board = PuzzleBoard(self.board_size)
         layout.addWidget(self.current_board, alignment=Qt.AlignCenter)
         
         # Step info
@@ -296,9 +379,10 @@ class MainWindow(QMainWindow):
         self.cost_label = QLabel("Cost of Path: -")
         self.nodes_label = QLabel("Nodes Expanded: -")
         self.depth_label = QLabel("Search Depth: -")
+        self.frontier_label = QLabel("Frontier Size: -")
         self.time_label = QLabel("Running Time: -")
         
-        for label in [self.cost_label, self.nodes_label, self.depth_label, self.time_label]:
+        for label in [self.cost_label, self.nodes_label, self.depth_label, self.frontier_label, self.time_label]:
             label.setFont(QFont('Arial', 12))
             stats_layout.addWidget(label)
         
@@ -321,9 +405,8 @@ class MainWindow(QMainWindow):
         goal_group = QGroupBox("Goal State")
         goal_layout = QVBoxLayout()
         
-        self.goal_board = PuzzleBoard()
-        goal_state = np.array([[0, 1, 2], [3, 4, 5], [6, 7, 8]])
-        self.goal_board.set_state(goal_state)
+        self.goal_board = PuzzleBoard(self.board_size)
+        self.goal_board.set_state(self.goal_state())
         goal_layout.addWidget(self.goal_board)
         
         goal_group.setLayout(goal_layout)
@@ -333,18 +416,52 @@ class MainWindow(QMainWindow):
         panel.setLayout(layout)
         return panel
     
+    def build_input_tiles(self):
+        """Create one input button per cell of the current board size"""
+        for row in self.input_tiles:
+            for btn in row:
+                self.input_layout.removeWidget(btn)
+                btn.deleteLater()
+        self.input_tiles = []
+        for i in range(self.board_size):
+            row = []
+            for j in range(self.board_size):
+                btn = ModernButton("0")
+                btn.setMinimumSize(45, 45)
+                btn.setFont(QFont('Arial', 12, QFont.Bold))
+                btn.clicked.connect(lambda checked, x=i, y=j: self.cycle_tile(x, y))
+                self.input_layout.addWidget(btn, i, j)
+                row.append(btn)
+            self.input_tiles.append(row)
+
+    def set_board_size(self, size):
+        """Switch every board to a new width and forget the current puzzle"""
+        self.board_size = size
+        self.build_input_tiles()
+        for board in (self.init_board, self.current_board, self.goal_board):
+            board.set_size(size)
+        self.goal_board.set_state(self.goal_state())
+        if hasattr(self, 'initial_state'):
+            del self.initial_state
+        self.solution = []
+        self.path_to_goal = []
+
+    def goal_state(self):
+        n = self.board_size
+        return np.arange(n * n).reshape(n, n)
+    
     def cycle_tile(self, i, j):
-        """Cycle through numbers 0-8 when clicking input tile"""
+        """Cycle through numbers 0..n*n-1 when clicking input tile"""
         current = int(self.input_tiles[i][j].text())
-        next_val = (current + 1) % 9
+        next_val = (current + 1) % (self.board_size * self.board_size)
         self.input_tiles[i][j].setText(str(next_val))
     
     def generate_random_state(self):
         """Generate a solvable random initial state"""
-        # Create a solved state and shuffle it
-        state = list(range(9))
+        n = self.board_size
+        state = list(range(n * n))
         
-        # Ensure solvability by doing valid moves
+        # Half of all shuffles are solvable, so retry until one is
         import random
         for _ in range(100):
             random.shuffle(state)
@@ -352,36 +469,30 @@ class MainWindow(QMainWindow):
                 break
         
         # Update input tiles
-        for i in range(3):
-            for j in range(3):
-                self.input_tiles[i][j].setText(str(state[i * 3 + j]))
+        for i in range(n):
+            for j in range(n):
+                self.input_tiles[i][j].setText(str(state[i * n + j]))
     
     def is_solvable(self, puzzle):
-        """Check if puzzle is solvable"""
-        inversions = 0
-        puzzle_list = [x for x in puzzle if x != 0]
-        
-        for i in range(len(puzzle_list)):
-            for j in range(i + 1, len(puzzle_list)):
-                if puzzle_list[i] > puzzle_list[j]:
-                    inversions += 1
-        
-        return inversions % 2 == 0
+        """Check if puzzle can reach the goal (the parity rule depends on the width)"""
+        board = get_board(self.board_size)
+        return board.solvable(board.encode(puzzle), board.encode(self.goal_state()))
     
     def set_initial_state(self):
         """Set the initial state from input tiles"""
-        state = np.zeros((3, 3), dtype=int)
+        n = self.board_size
+        state = np.zeros((n, n), dtype=int)
         values = []
         
-        for i in range(3):
-            for j in range(3):
+        for i in range(n):
+            for j in range(n):
                 val = int(self.input_tiles[i][j].text())
                 state[i][j] = val
                 values.append(val)
         
-        # Check if all numbers 0-8 are present
-        if sorted(values) != list(range(9)):
-            QMessageBox.warning(self, "Invalid State", "Please ensure all numbers 0-8 are used exactly once!")
+        # Check if all numbers are present
+        if sorted(values) != list(range(n * n)):
+            QMessageBox.warning(self, "Invalid State", f"Please ensure all numbers 0-{n * n - 1} are used exactly once!")
             return
         
         # Check if solvable
@@ -394,97 +505,106 @@ class MainWindow(QMainWindow):
         QMessageBox.information(self, "Success", "Initial state set successfully!")
     
     def solve_puzzle(self):
-        """Solve the puzzle using selected algorithm"""
+        """Solve the puzzle using selected algorithm on a worker thread"""
+        if self.worker is not None:
+            self.cancel_solve()
+            return
+
         if not hasattr(self, 'initial_state'):
             QMessageBox.warning(self, "No Initial State", "Please set an initial state first!")
             return
         
         algorithm = self.algo_combo.currentText()
-        goal = np.array([[0, 1, 2], [3, 4, 5], [6, 7, 8]])
-        
+        goal = self.goal_state()
+
+        for label, text in [(self.cost_label, "Cost of Path: -"), (self.nodes_label, "Nodes Expanded: 0"),
+                            (self.depth_label, "Search Depth: -"), (self.frontier_label, "Frontier Size: 0"),
+                            (self.time_label, "Running Time: -")]:
+            label.setText(text)
+        self.solve_btn.setText("⏹ Cancel")
+        self.algo_combo.setEnabled(False)
+        self.size_spin.setEnabled(False)
+
+        self.solve_thread = QThread()
+        self.worker = SolveWorker(algorithm, self.initial_state, goal, self.cache)
+        self.worker.moveToThread(self.solve_thread)
+        self.solve_thread.started.connect(self.worker.run)
+        self.worker.progress.connect(self.show_progress)
+        self.worker.finished.connect(self.solve_finished)
+        self.worker.failed.connect(self.solve_failed)
+        self.worker.cancelled.connect(self.solve_cancelled)
+        for signal in (self.worker.finished, self.worker.failed, self.worker.cancelled):
+            signal.connect(self.solve_thread.quit)
+        self.solve_thread.finished.connect(self.solve_thread_done)
+        self.solve_thread.start()
+
+    def closeEvent(self, event):
+        """Stop a running search before the window goes away"""
+        if self.worker is not None:
+            self.worker.cancel_requested = True
+            self.solve_thread.quit()
+            self.solve_thread.wait()
+        self.cache.close()
+        super().closeEvent(event)
+
+    def cancel_solve(self):
+        """Ask the running search to stop at its next progress report"""
+        self.worker.cancel_requested = True
         self.solve_btn.setEnabled(False)
-        self.solve_btn.setText("Solving...")
-        QApplication.processEvents()
-        
-        try:
-            start_time = time.time()
-            
-            # Call the appropriate algorithm
-            if algorithm == "BFS":
-                solver = BFS(self.initial_state, goal)
-                self.path, cost, nodes_expanded, depth = solver.BFS_Algorithm()
-                self.path_to_goal = solver.path_to_goal
-            
-            elif algorithm == "DFS":
-                    solver = DFS(self.initial_state, goal)
-                    result = solver.DFS_Algorithm() 
-                    
-                    if result == 1:  # Success
-                        self.path = solver.Path
-                        cost = solver.Cost
-                        nodes_expanded = len(solver.expanded_nodes)
-                        depth = solver.depth
-                        self.path_to_goal = solver.moves
-                    else:
-                        QMessageBox.information(self, "No Solution", "DFS could not find a solution!")
-                        return  
-
-            elif algorithm == "Iterative DFS":
-                    solver = IDS(self.initial_state, goal)
-                    result = solver.IDS_search()  
-                    
-                    if result == 1:  
-                        self.path = solver.Path
-                        cost = solver.Cost
-                        nodes_expanded = len(solver.expanded_nodes)
-                        depth = solver.depth
-                        self.path_to_goal = solver.moves
-                    else:
-                        QMessageBox.information(self, "No Solution", "IDS could not find a solution!")
-                        return
-            
-            elif "A*" in algorithm:
-                if "Manhattan" in algorithm:
-                    heuristic_func = manhattan_distance
-                elif "Euclidean" in algorithm:
-                    heuristic_func = euclidean_distance
-                else:
-                    heuristic_func = manhattan_distance  
-                
-                solver = AStar(self.initial_state, goal)
-                self.path, cost, nodes_expanded, depth, self.path_to_goal = solver.AStar_Algorithm(heuristic_func)   
-            end_time = time.time()
-            
-            self.display_results(cost, nodes_expanded, depth, end_time - start_time)
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"An error occurred: {str(e)}")
-        
-        finally:
-            self.solve_btn.setEnabled(True)
-            self.solve_btn.setText("🚀 SOLVE PUZZLE")
+        self.solve_btn.setText("Cancelling...")
+
+    def show_progress(self, stats):
+        self.nodes_label.setText(f"Nodes Expanded: {stats['expanded']} "
+                                 f"({stats['generated']} generated, {stats['duplicates']} duplicates)")
+        self.frontier_label.setText(f"Frontier Size: {stats['frontier']}")
+        bound = "" if stats['bound'] is None else f" (bound {stats['bound']})"
+        self.depth_label.setText(f"Search Depth: {stats['depth']}{bound}")
+        self.time_label.setText(f"Running Time: {stats['elapsed']:.1f} seconds "
+                                f"({stats['rate']:,.0f} expansions/s)")
+
+    def solve_finished(self, solution, elapsed, cached):
+        self.solution = solution
+        self.path_to_goal = solution.move_names()
+        if not solution.solved:
+            QMessageBox.information(self, "No Solution", f"{self.worker.algorithm} could not find a solution!")
+        self.display_results(solution.cost, solution.nodes_expanded, solution.depth, elapsed)
+        if cached:
+            self.time_label.setText(self.time_label.text() + " (cached)")
+
+    def solve_failed(self, message):
+        QMessageBox.critical(self, "Error", f"An error occurred: {message}")
+
+    def solve_cancelled(self):
+        self.time_label.setText(self.time_label.text() + " (cancelled)")
+
+    def solve_thread_done(self):
+        self.worker.deleteLater()
+        self.solve_thread.deleteLater()
+        self.worker = None
+        self.solve_thread = None
+        self.solve_btn.setEnabled(True)
+        self.solve_btn.setText("🚀 SOLVE PUZZLE")
+        self.algo_combo.setEnabled(True)
+        self.size_spin.setEnabled(True)
     
     def simulate_solution(self):
         """Simulate a solution for testing (remove when you integrate real algorithms)"""
-        # Create a dummy solution path
-        self.path = [
-            self.initial_state,
-            self.initial_state.copy(),
-            np.array([[0, 1, 2], [3, 4, 5], [6, 7, 8]])
-        ]
-        self.path_to_goal = ["Up", "Left"]
-        
-        cost = len(self.path_to_goal)
-        nodes_expanded = 50
-        depth = cost
+        # Create a dummy solution: the blank steps away and back
+        board = get_board(self.board_size)
+        state = board.encode(self.initial_state)
+        move = next(move for _, move in board.children(state))
+        self.solution = Solution(state, [move, inverse(move)], True, 50)
+        self.path_to_goal = self.solution.move_names()
+        
         running_time = 0.05
         
-        self.display_results(cost, nodes_expanded, depth, running_time)
+        self.display_results(self.solution.cost, self.solution.nodes_expanded, self.solution.depth, running_time)
     
     def display_results(self, cost, nodes_expanded, depth, running_time):
         """Display the results of the search"""
         self.cost_label.setText(f"Cost of Path: {cost}")
         self.nodes_label.setText(f"Nodes Expanded: {nodes_expanded}")
+        self.frontier_label.setText("Frontier Size: -")
         self.depth_label.setText(f"Search Depth: {depth}")
         self.time_label.setText(f"Running Time: {running_time:.4f} seconds")
         
@@ -496,7 +616,7 @@ class MainWindow(QMainWindow):
             self.path_text.setText("No solution found!")
         
         # Enable visualization controls
-        if len(self.path) > 0:
+        if len(self.solution) > 0:
             self.current_step = 0
             self.show_current_step()
             self.first_btn.setEnabled(True)
@@ -507,9 +627,9 @@ class MainWindow(QMainWindow):
     
     def show_current_step(self):
         """Display the current step"""
-        if 0 <= self.current_step < len(self.path):
-            self.current_board.set_state(self.path[self.current_step])
-            self.step_label.setText(f"Step: {self.current_step} / {len(self.path) - 1}")
+        if 0 <= self.current_step < len(self.solution):
+            self.current_board.set_state(self.solution[self.current_step])
+            self.step_label.setText(f"Step: {self.current_step} / {len(self.solution) - 1}")
             
             # Show move
             if self.current_step > 0 and self.current_step - 1 < len(self.path_to_goal):
@@ -530,7 +650,7 @@ class MainWindow(QMainWindow):
     
     def show_next_step(self):
         """Show the next step"""
-        if self.current_step < len(self.path) - 1:
+        if self.current_step < len(self.solution) - 1:
             self.current_step += 1
             self.show_current_step()
         else:
@@ -539,7 +659,7 @@ class MainWindow(QMainWindow):
     
     def show_last_step(self):
         """Show the last step"""
-        self.current_step = len(self.path) - 1
+        self.current_step = len(self.solution) - 1
         self.show_current_step()
     
     def toggle_play(self):
@@ -548,7 +668,7 @@ class MainWindow(QMainWindow):
             self.timer.stop()
             self.play_btn.setText("▶ Play")
         else:
-            if self.current_step >= len(self.path) - 1:
+            if self.current_step >= len(self.solution) - 1:
                 self.current_step = 0
             self.timer.start(self.speed_slider.value())
             self.play_btn.setText("⏸ Pause")
@@ -0,0 +1,266 @@
+import os
+import time
+import multiprocessing
+from queue import Empty
+from State import get_board, board_of
+from Progress import SearchStats, memory_in_use
+from Solution import Solution
+from ASTAR import open_list_for
+from Stream import finish, within_budget
+
+# Hash-distributed A* (HDA*). Every state has one owner process, picked by
+# hashing the packed state. Only the owner keeps the state's g, parent and
+# open-list entry. Children bound for another owner are buffered and sent
+# BATCH at a time over that owner's queue, so the per-message pickling
+# cost is shared. The process that owns the goal publishes each cheaper
+# path as the incumbent. Every worker prunes f >= incumbent, so the search
+# ends once no worker has an open state below it and no batch is in
+# flight. Termination is checked by the parent on per-worker counters.
+
+BATCH = 256  # children per message
+ROUND = 128  # expansions between inbox checks
+POLL = 0.005  # seconds between termination checks in the parent
+
+# Per-worker slots in the shared counter array
+SENT, RECEIVED, IDLE, EXPANDED, GENERATED, DUPLICATES, OPEN, CLOSED, MEMORY = range(9)
+SLOTS = 9
+
+MASK64 = (1 << 64) - 1
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+
+
+def owner(state, workers):
+    """Worker that owns a state; mixes all bits so neighbours spread out"""
+    mixed = (((state & MASK64) ^ (state >> 64)) * HASH_MULTIPLIER) & MASK64
+    return (mixed >> 32) % workers
+
+
+class HDAStar():
+    """A* spread over worker processes by state hash (HDA*).
+
+    solve() returns an optimal Solution for a consistent heuristic. The
+    heuristic must be picklable, such as a module-level function, because
+    each worker evaluates it for the states it owns.
+    """
+    def __init__(self, matrix, goal, size=None, progress=None, workers=None, budget=None):
+        self.matrix = matrix
+        self.goal = goal
+        self.stats = SearchStats(progress, budget)
+        self.board = get_board(size or len(matrix))
+        self.workers = workers or os.cpu_count() or 1
+
+    def solve(self, heuristic_function):
+        return finish(self.stream(heuristic_function))
+
+    def partial(self, last):
+        """Result for a search stopped by its budget: statistics only, as
+        the workers hold the paths"""
+        return Solution.unsolved(self.board.encode(self.matrix), self.stats.expanded)
+
+    @within_budget
+    def stream(self, heuristic_function):
+        """solve() as a generator: None after every poll of the workers, then
+        the Solution. Closing it stops the workers."""
+        board, stats, workers = self.board, self.stats, self.workers
+        start = board.encode(self.matrix)
+        goal = board.encode(self.goal)
+        if start == goal:
+            yield Solution(start)
+            return
+        if not board.solvable(start, goal):
+            yield Solution.unsolved(start)
+            return
+        # Builds any tables the heuristic loads before the workers start
+        heuristic_function(start, goal)
+
+        inboxes = [multiprocessing.Queue() for _ in range(workers)]
+        replies = multiprocessing.Queue()
+        counters = multiprocessing.RawArray("q", workers * SLOTS)
+        # Only the goal's owner writes the incumbent, so it needs no lock
+        best = multiprocessing.RawValue("d", float("inf"))
+        done = multiprocessing.Event()
+        # Workers report their memory growth only when a budget limits it
+        track_memory = stats.budget is not None and stats.budget.max_memory is not None
+        processes = [
+            multiprocessing.Process(target=search_worker, daemon=True,
+                                    args=(rank, workers, start, goal, heuristic_function,
+                                          inboxes, replies, counters, best, done, track_memory))
+            for rank in range(workers)
+        ]
+        for process in processes:
+            process.start()
+
+        try:
+            yield from self.wait(processes, counters, best)
+            done.set()
+            for _ in processes:
+                replies.get()  # every worker has stopped searching
+            if best.value == float("inf"):
+                yield Solution.unsolved(start, stats.expanded)
+                return
+            # Walk the parent pointers back from the goal, asking each owner
+            moves = bytearray()
+            state = goal
+            while state != start:
+                inboxes[owner(state, workers)].put(state)
+                parent = replies.get()
+                moves.append(board.move_between(parent, state))
+                state = parent
+            moves.reverse()
+            yield Solution(start, moves, True, stats.expanded)
+        finally:
+            done.set()
+            for inbox in inboxes:
+                inbox.put(None)
+            for process in processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+
+    def wait(self, processes, counters, best):
+        """Poll until every worker is idle with nothing in flight, twice
+        running; yields None after each poll"""
+        stats, workers = self.stats, self.workers
+        previous = None
+        while True:
+            time.sleep(POLL)
+            snapshot = counters[:]
+            slots = [snapshot[rank * SLOTS:(rank + 1) * SLOTS] for rank in range(workers)]
+            stats.expanded = sum(slot[EXPANDED] for slot in slots)
+            stats.generated = sum(slot[GENERATED] for slot in slots)
+            stats.duplicates = sum(slot[DUPLICATES] for slot in slots)
+            stats.bound = None if best.value == float("inf") else best.value
+            stats.frontier = sum(slot[OPEN] for slot in slots)
+            stats.closed = sum(slot[CLOSED] for slot in slots)
+            if stats.budget is not None:
+                # Checked per poll, so the workers may overshoot it by a few
+                # rounds. Memory adds what each worker has grown by.
+                stats.budget.check(stats, every=1, extra_memory=sum(slot[MEMORY] for slot in slots))
+            if stats.progress is not None:
+                stats.progress(stats)
+            yield None
+            for process in processes:
+                if process.exitcode is not None:
+                    raise RuntimeError(f"HDA* worker exited with code {process.exitcode}")
+            quiet = (all(slot[IDLE] for slot in slots)
+                     and sum(slot[SENT] for slot in slots) == sum(slot[RECEIVED] for slot in slots))
+            if quiet and snapshot == previous:
+                return
+            previous = snapshot if quiet else None
+
+
+def search_worker(rank, workers, start, goal, heuristic_function, inboxes, replies, counters, best, done,
+                  track_memory=False):
+    """One HDA* process: expands the states it owns, then answers parent queries"""
+    board = board_of(start)
+    start_memory = memory_in_use() if track_memory else 0
+    inbox = inboxes[rank]
+    base = rank * SLOTS
+    g_costs = {}
+    parent = {}
+    open_list = open_list_for(heuristic_function(start, goal))
+    outboxes = [[] for _ in range(workers)]
+    sent = received = expanded = generated = duplicates = 0
+    for queue in inboxes:
+        # Batches still buffered when the search ends may be dropped
+        queue.cancel_join_thread()
+
+    def relax(state, g, from_state):
+        nonlocal duplicates
+        if state in g_costs and g >= g_costs[state]:
+            duplicates += 1
+            return
+        g_costs[state] = g
+        parent[state] = from_state
+        f = g + heuristic_function(state, goal)
+        if f < best.value:
+            open_list.push(state, f, g)
+
+    def flush():
+        nonlocal sent
+        for target, batch in enumerate(outboxes):
+            if batch:
+                inboxes[target].put(batch)
+                outboxes[target] = []
+                sent += 1
+
+    def publish():
+        counters[base + SENT] = sent
+        counters[base + RECEIVED] = received
+        counters[base + EXPANDED] = expanded
+        counters[base + GENERATED] = generated
+        counters[base + DUPLICATES] = duplicates
+        counters[base + OPEN] = len(open_list)
+        counters[base + CLOSED] = len(g_costs)
+        if track_memory:
+            counters[base + MEMORY] = memory_in_use() - start_memory
+
+    if owner(start, workers) == rank:
+        relax(start, 0, None)
+
+    while not done.is_set():
+        # Take in whatever has arrived; leaving idle comes before counting
+        # the batch, so the parent never sees idle workers and matching
+        # counters while one is still unread
+        while True:
+            try:
+                batch = inbox.get_nowait()
+            except Empty:
+                break
+            if batch is None:
+                return
+            counters[base + IDLE] = 0
+            received += 1
+            for state, g, from_state in batch:
+                relax(state, g, from_state)
+
+        # Expand up to ROUND states; running out of work breaks to the idle path
+        for _ in range(ROUND):
+            if not open_list or open_list.min_f() >= best.value:
+                break
+            current, _, current_g = open_list.pop()
+            if current == goal:
+                # f = g here, and anything at or above best is never popped
+                best.value = current_g
+                continue
+            expanded += 1
+            for child, _ in board.children(current):
+                generated += 1
+                target = owner(child, workers)
+                if target == rank:
+                    relax(child, current_g + 1, current)
+                else:
+                    outbox = outboxes[target]
+                    outbox.append((child, current_g + 1, current))
+                    if len(outbox) >= BATCH:
+                        inboxes[target].put(outbox)
+                        outboxes[target] = []
+                        sent += 1
+        else:
+            publish()
+            continue
+
+        # Nothing left below the incumbent: send what is buffered, report
+        # idle and wait for more work
+        flush()
+        publish()
+        counters[base + IDLE] = 1
+        try:
+            batch = inbox.get(timeout=POLL)
+        except Empty:
+            continue
+        if batch is None:
+            return
+        counters[base + IDLE] = 0
+        received += 1
+        for state, g, from_state in batch:
+            relax(state, g, from_state)
+
+    # Searching is over: answer parent lookups for path reconstruction
+    replies.put(rank)
+    while True:
+        message = inbox.get()
+        if message is None:
+            return
+        if isinstance(message, int):
+            replies.put(parent[message])
@@ -0,0 +1,128 @@
+import math
+from State import get_board, inverse
+from Progress import SearchStats
+from Solution import Solution
+from Trace import EXPAND, GOAL, BOUND
+from Stream import finish, within_budget
+
+class IDAStar():
+    """Iterative deepening A*: depth-first passes bounded by f = g + h.
+
+    Only the current path is kept in memory, and the move that would undo
+    the previous one is never tried. Bounds are rounded up to whole moves,
+    so a real-valued heuristic such as the Euclidean distance takes one
+    pass per path length rather than one per distinct f.
+    """
+    def __init__(self, matrix, goal, size=None, progress=None, trace=None, budget=None):
+        self.cost = 0
+        self.path = []
+        self.path_to_goal = []
+        self.nodes_expanded = 0
+        self.depth = 0
+        self.matrix = matrix
+        self.goal = goal
+        self.stats = SearchStats(progress, budget)
+        self.trace = trace  # optional Trace.TraceWriter
+        self.board = get_board(size or len(matrix))
+        # Moves to the expanded state with the smallest h, for partial()
+        self.closest = b""
+        self.closest_h = float('inf')
+
+    def search(self, path, moves, bound, heuristic_function, goal):
+        """One pass bounded by f <= bound from path[-1], as a generator of
+        expanded states. Returns True with the goal at the end of the path,
+        else the smallest f over the bound. A stack of child generators, one
+        per level, stands in for recursion so any depth can yield."""
+        board, stats, trace = self.board, self.stats, self.trace
+        minimum = float('inf')
+        stack = []
+        state = path[-1]
+        while True:
+            # `state` has just been put on the path
+            g = len(moves)
+            h = heuristic_function(state, goal)
+            f = g + h
+            if f > bound:
+                if f < minimum:
+                    minimum = f
+                if not stack:
+                    return minimum
+                path.pop()
+                moves.pop()
+            else:
+                if trace is not None:
+                    trace.record(GOAL if state == goal else EXPAND, state, path[-2] if g else None, g, h)
+                if state == goal:
+                    return True
+                if h < self.closest_h:
+                    self.closest, self.closest_h = bytes(moves), h
+                stats.frontier, stats.depth = len(path), g
+                stats.tick()
+                yield state
+                stack.append(board.children(state))
+
+            # Next child to try, backing up through exhausted levels
+            while stack:
+                last = moves[-1] if moves else None
+                for child, move in stack[-1]:
+                    stats.generated += 1
+                    if last is not None and move == inverse(last):
+                        stats.duplicates += 1
+                        continue
+                    break
+                else:
+                    stack.pop()
+                    if moves:
+                        path.pop()
+                        moves.pop()
+                    continue
+                path.append(child)
+                moves.append(move)
+                state = child
+                break
+            else:
+                return minimum
+
+    def partial(self, last):
+        """Result for a search stopped by its budget: the path to the expanded
+        state closest to the goal"""
+        start = self.board.encode(self.matrix)
+        return Solution(start, self.closest, False, self.stats.expanded)
+
+    def IDAStar_Algorithm(self, heuristic_function):
+        """Older interface: (path, cost, nodes_expanded, depth, path_to_goal)"""
+        solution = self.solve(heuristic_function)
+        self.path, self.cost, self.nodes_expanded, self.depth, self.path_to_goal = solution.as_tuple()
+        return self.path, self.cost, self.nodes_expanded, self.depth, self.path_to_goal
+
+    def solve(self, heuristic_function):
+        return finish(self.stream(heuristic_function))
+
+    @within_budget
+    def stream(self, heuristic_function):
+        start = self.board.encode(self.matrix)
+        goal = self.board.encode(self.goal)
+        trace = self.trace
+        if trace is not None:
+            trace.begin(start, goal)
+        if not self.board.solvable(start, goal):
+            # Unsolvable: without a closed set the bound would grow forever
+            yield Solution.unsolved(start)
+            return
+        bound = math.ceil(heuristic_function(start, goal))
+        path = [start]
+        moves = []
+        self.closest, self.closest_h = b"", float('inf')
+
+        while True:
+            self.stats.bound = bound
+            if trace is not None:
+                trace.record(BOUND, start, None, 0, bound)
+            t = yield from self.search(path, moves, bound, heuristic_function, goal)
+            if t is True:
+                yield Solution(start, moves, True, self.stats.expanded)
+                return
+            if t == float('inf'):
+                yield Solution.unsolved(start, self.stats.expanded)
+                return
+            bound = math.ceil(t)
@@ -1,152 +1,136 @@
-from collections import deque
-import numpy as np
+from State import get_board
+from Progress import SearchStats
+from Solution import Solution
+from Trace import EXPAND, GOAL, BOUND
+from Stream import finish, within_budget
 
 class IDS():
-    def __init__(self, matrix, goal):
+    """Iterative deepening DFS holding only the current path.
+
+    Each pass is a depth-limited DFS driven by a stack of child generators,
+    one per level, so memory is O(depth) no matter how many states the pass
+    visits. States already on the path are never re-entered, which also
+    drops the move that undoes the previous one.
+    """
+    def __init__(self, matrix, goal, size=None, progress=None, trace=None, budget=None):
         self.Cost = 0
         self.Path = []
         self.depth = 0
         self.matrix = matrix
         self.goal = goal
-        self.explored = set()
-        self.expanded_nodes = set()
-        self.parent = {}
+        self.stats = SearchStats(progress, budget)
+        self.trace = trace  # optional Trace.TraceWriter
+        self.board = get_board(size or len(matrix))
+        self.nodes_expanded = 0
         self.moves = []
-        self.depth_tracker = {}
-    
-    def matrix_to_tuple(self, matrix):
-        return tuple(map(tuple, matrix))
-    
-    def get_neighbors(self, Current_State):
-        neighbors = []
-        Row, Col = np.where(Current_State == 0)
-        Row, Col = Row[0], Col[0]
-        
-        if Row != 0:
-            new_State = Current_State.copy()
-            new_State[Row][Col], new_State[Row-1][Col] = new_State[Row-1][Col], new_State[Row][Col]
-            neighbors.append(new_State)
-        
-        if Col != 0:
-            new_State = Current_State.copy()
-            new_State[Row][Col], new_State[Row][Col-1] = new_State[Row][Col-1], new_State[Row][Col]
-            neighbors.append(new_State)
-        
-        if Row != 2:
-            new_State = Current_State.copy()
-            new_State[Row][Col], new_State[Row+1][Col] = new_State[Row+1][Col], new_State[Row][Col]
-            neighbors.append(new_State)
-        
-        if Col != 2:
-            new_State = Current_State.copy()
-            new_State[Row][Col], new_State[Row][Col+1] = new_State[Row][Col+1], new_State[Row][Col]
-            neighbors.append(new_State)
-        
-        return neighbors
-    
-    def get_move_direction(self, state1, state2):
-        """Determine which direction the blank moved"""
-        pos1 = np.where(state1 == 0)
-        pos2 = np.where(state2 == 0)
-        row1, col1 = pos1[0][0], pos1[1][0]
-        row2, col2 = pos2[0][0], pos2[1][0]
-        
-        if row2 < row1:
-            return "Up"
-        elif row2 > row1:
-            return "Down"
-        elif col2 < col1:
-            return "Left"
-        elif col2 > col1:
-            return "Right"
-        return ""
-    
-    def IDS_search(self):
-        total_expanded = set()  # Track all expanded nodes across iterations
-        
-        for depth_limit in range(1, 40):
-            # Reset state for this depth iteration
-            self.parent = {}
-            self.depth_tracker = {}
-            self.moves = []
-            self.Path = []
-            
-            # Run DLS with current depth limit
-            isSolution = self.DLS_Algorithm(max_depth=depth_limit)
-            
-            # Accumulate expanded nodes
-            total_expanded.update(self.expanded_nodes)
-            
-            if isSolution:
-                self.expanded_nodes = total_expanded  # Set total count
-                return True
-        
-        self.expanded_nodes = total_expanded
-        return False
+        self.current_moves = []  # path of the running depth-limited pass
+
+    def IDS_search(self, max_depth=None):
+        """Older interface: True or False, with Path, Cost, moves and depth filled in"""
+        solution = self.solve(max_depth)
+        self.Path, self.Cost, self.nodes_expanded, self.depth, self.moves = solution.as_tuple()
+        return solution.solved
+
+    def solve(self, max_depth=None):
+        return finish(self.stream(max_depth))
+
+    @within_budget
+    def stream(self, max_depth=None):
+        start = self.board.encode(self.matrix)
+        goal = self.board.encode(self.goal)
+        trace = self.trace
+        if trace is not None:
+            trace.begin(start, goal)
+        if not self.board.solvable(start, goal):
+            # No closed set, so an unbounded search would never stop
+            yield Solution.unsolved(start)
+            return
+
+        depth_limit = 0
+        while max_depth is None or depth_limit <= max_depth:
+            self.stats.bound = depth_limit
+            if trace is not None:
+                trace.record(BOUND, start, None, 0, depth_limit)
+            moves = yield from self.depth_limited(depth_limit)
+            if moves is not None:
+                yield Solution(start, moves, True, self.stats.expanded)
+                return
+            depth_limit += 1
+        yield Solution.unsolved(start, self.stats.expanded, max_depth)
+
+    def partial(self, last):
+        """Result for a search stopped by its budget: the path of the pass
+        that was running"""
+        start = self.board.encode(self.matrix)
+        return Solution(start, self.current_moves, False, self.stats.expanded)
+
+    def DLS_Algorithm(self, max_depth):
+        """One depth-limited pass: True with Path, Cost and moves filled in if
+        the goal is within max_depth, else False"""
+        search = self.depth_limited(max_depth)
+        while True:
+            try:
+                next(search)
+            except StopIteration as done:
+                moves = done.value
+                break
+        if moves is None:
+            return False
+        solution = Solution(self.board.encode(self.matrix), moves, True, self.stats.expanded)
+        self.Path, self.Cost, self.nodes_expanded, self.depth, self.moves = solution.as_tuple()
+        return True
+
+    def depth_limited(self, max_depth):
+        """DLS_Algorithm as a generator of expanded states, returning the moves"""
+        board, stats, trace = self.board, self.stats, self.trace
+        start = board.encode(self.matrix)
+        goal = board.encode(self.goal)
+        path = [start]
+        moves = self.current_moves = []
+        on_path = {start}
 
-    def DLS_Algorithm(self, max_depth=None):
-        Ids_deque = deque([(self.matrix, 0, None)])  # Store (state, depth, parent) tuples
-        initial_tuple = self.matrix_to_tuple(self.matrix)
-        self.expanded_nodes = set([initial_tuple])  # Reset for this iteration
-        
-        current_max_depth = 0
-        visited_at_depth = {}  # Track the depth at which we visited each state
-        
-        while len(Ids_deque) > 0:
-            Current_State, current_depth, parent_tuple = Ids_deque.pop()
-            Current_State_as_tuple = self.matrix_to_tuple(Current_State)
-            
-            # Skip if we've already visited this state at this depth or shallower
-            if Current_State_as_tuple in visited_at_depth and visited_at_depth[Current_State_as_tuple] <= current_depth:
-                continue
-            
-            visited_at_depth[Current_State_as_tuple] = current_depth
-            
-            # Update parent
-            if Current_State_as_tuple not in self.parent or current_depth < self.depth_tracker.get(Current_State_as_tuple, float('inf')):
-                self.parent[Current_State_as_tuple] = parent_tuple
-                self.depth_tracker[Current_State_as_tuple] = current_depth
-            
-            current_max_depth = max(current_max_depth, current_depth)
-            
-            if np.array_equal(Current_State, self.goal):
-                self.create_path(Current_State_as_tuple)
-                self.depth = current_max_depth
-                self.Cost = len(self.Path) - 1
-                return True
-            
-            if max_depth is not None and current_depth >= max_depth:
-                continue
-            
-            neighbors = self.get_neighbors(Current_State)
-            
-            for neighbor in neighbors:
-                new_tuple = self.matrix_to_tuple(neighbor)
-                self.expanded_nodes.add(new_tuple)
-                Ids_deque.append((neighbor, current_depth + 1, Current_State_as_tuple))
-        
-        self.depth = current_max_depth
-        return False
+        found = start == goal
+        if found and trace is not None:
+            trace.record(GOAL, start)
+        if not found and max_depth > 0:
+            stats.frontier, stats.depth = 1, 0
+            stats.tick()
+            if trace is not None:
+                trace.record(EXPAND, start)
+            yield start
+            stack = [board.children(start)]
+        else:
+            stack = []
 
-    def create_path(self, goal_tuple):
-        """Reconstruct the path from start to goal"""
-        path = []
-        current = goal_tuple
-        start_tuple = self.matrix_to_tuple(self.matrix)
-        
-        while current != start_tuple:
-            path.append(current)
-            current = self.parent[current]
-        
-        path.append(start_tuple)
-        path.reverse()
-        
-        self.Path = [np.array(state) for state in path]
-        
-        for i in range(len(self.Path) - 1):
-            move = self.get_move_direction(self.Path[i], self.Path[i+1])
-            self.moves.append(move)
-        
-        self.Cost = len(self.Path) - 1
-        self.depth = len(self.Path) - 1
+        while stack and not found:
+            for child, move in stack[-1]:
+                stats.generated += 1
+                if child in on_path:
+                    stats.duplicates += 1
+                    continue
+                if child == goal:
+                    if trace is not None:
+                        trace.record(GOAL, child, path[-1], len(path))
+                    path.append(child)
+                    moves.append(move)
+                    found = True
+                    break
+                if len(path) < max_depth:
+                    # Descend: the generator below resumes when we come back
+                    path.append(child)
+                    moves.append(move)
+                    on_path.add(child)
+                    stats.frontier, stats.depth = len(path), len(moves)
+                    stats.tick()
+                    if trace is not None:
+                        trace.record(EXPAND, child, path[-2], len(moves))
+                    yield child
+                    stack.append(board.children(child))
+                    break
+            else:
+                stack.pop()
+                on_path.discard(path.pop())
+                if moves:
+                    moves.pop()
 
+        return moves if found else None
@@ -1,6 +1,18 @@
 class Node():
-    def __init__(self , value):
+    __slots__ = ("value", "parent", "children", "move", "depth")
+
+    def __init__(self , value, move=None):
         self.value = value 
+        self.parent = None
         self.children = []
+        self.move = move  # move that led here from the parent, if known
+        self.depth = 0
+
     def add_child(self , child_node):
+        child_node.parent = self
+        child_node.depth = self.depth + 1
         self.children.append(child_node)
+
+    def remove_child(self, child_node):
+        self.children.remove(child_node)
+        child_node.parent = None
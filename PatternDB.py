@@ -0,0 +1,189 @@
+import os
+import mmap
+from math import perm
+from State import as_state, board_of
+from DistanceTable import TABLE_DIR, write_table
+from Progress import CHECK_INTERVAL
+
+# Pattern databases for additive heuristics. A pattern is a set of tiles;
+# its database stores, for every placement of those tiles and every region
+# the blank can roam without moving one of them, the fewest moves *of
+# pattern tiles* needed to bring them home with all other tiles treated as
+# indistinguishable. Moves of other tiles are free, so databases over
+# disjoint patterns can be summed and stay admissible. Keeping the blank's
+# region in the key, rather than the minimum over regions, also keeps the
+# sum consistent: one move changes it by at most 1, which A* relies on to
+# never reopen a state.
+
+UNSEEN = 0xFF
+
+# Tiles per pattern for the default partition of each width. Pure-Python
+# builds are bounded by n!/(n-k)! placements times n*n blank regions, which
+# rules out the 7-8 split for the 15-puzzle unless a caller passes it
+# explicitly and is patient.
+DEFAULT_GROUP = {2: 3, 3: 4, 4: 5, 5: 4}
+
+
+class PatternDatabase():
+    """Distance table for one pattern, built by backward BFS and memory-mapped.
+
+    Entries are indexed by key(): the pattern's placement times the number
+    of cells, plus the lowest cell of the blank's region.
+
+    A build calls check() every CHECK_INTERVAL nodes, which may raise to
+    abandon it.
+    """
+    def __init__(self, goal, pattern, path=None, check=None):
+        self.goal = as_state(goal)
+        self.board = board_of(self.goal)
+        self.pattern = tuple(pattern)
+        cells, k = self.board.cells, len(self.pattern)
+        self.size = perm(cells, k) * cells
+        # Placement index: the i-th pattern tile's position among the cells
+        # still free, in a mixed radix of falling factorials
+        self.radix = tuple(perm(cells - 1 - i, k - 1 - i) for i in range(k))
+        size = self.board.size
+        self.full = (1 << cells) - 1
+        self.left_col = sum(1 << (r * size) for r in range(size))
+        self.right_col = self.left_col << (size - 1)
+        name = "_".join(str(tile) for tile in self.pattern)
+        self.path = path or os.path.join(TABLE_DIR, f"pdb_{self.goal:x}_{name}_regions.bin")
+        if not os.path.exists(self.path) or os.path.getsize(self.path) != self.size:
+            self.build(check)
+        with open(self.path, "rb") as f:
+            self.table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def index(self, positions):
+        used = 0
+        index = 0
+        for pos, radix in zip(positions, self.radix):
+            index += (pos - (used & ((1 << pos) - 1)).bit_count()) * radix
+            used |= 1 << pos
+        return index
+
+    def region(self, blank_pos, occupied):
+        """Cells the blank reaches at no cost, flood-filled as a bitmask"""
+        size, left_col, right_col = self.board.size, self.left_col, self.right_col
+        free = self.full & ~occupied
+        reach = 1 << blank_pos
+        while True:
+            grown = (reach | ((reach << 1) & ~left_col) | ((reach >> 1) & ~right_col)
+                     | (reach << size) | (reach >> size)) & free
+            if grown == reach:
+                return reach
+            reach = grown
+
+    def key(self, positions, blank_pos):
+        """Table index of a placement with the blank at blank_pos"""
+        reach = self.region(blank_pos, sum(1 << pos for pos in positions))
+        return self.index(positions) * self.board.cells + (reach & -reach).bit_length() - 1
+
+    def build(self, check=None):
+        board = self.board
+        cells, k = board.cells, len(self.pattern)
+        region = self.region
+        neighbors = [[target for target, *_ in board.moves[pos]] for pos in range(cells)]
+
+        # A search node is the pattern placement plus the blank's free region,
+        # packed as pos_0 | pos_1 << 5 | ... | region << 5k
+        goal_tiles = board.tiles(self.goal)
+        start = [goal_tiles.index(tile) for tile in self.pattern]
+        occupied = sum(1 << pos for pos in start)
+        start_region = region(board.blank(self.goal), occupied)
+
+        table = bytearray([UNSEEN]) * self.size
+
+        def pack(positions, reach):
+            node = reach << (5 * k)
+            for i, pos in enumerate(positions):
+                node |= pos << (5 * i)
+            return node
+
+        def mark(positions, reach, depth):
+            key = self.index(positions) * cells + (reach & -reach).bit_length() - 1
+            if table[key] != UNSEEN:
+                return False
+            table[key] = depth
+            return True
+
+        mark(start, start_region, 0)
+        layer = [pack(start, start_region)]
+        depth = 0
+        visited = 0
+        while layer:
+            next_layer = []
+            for node in layer:
+                visited += 1
+                if check is not None and visited % CHECK_INTERVAL == 0:
+                    check()
+                positions = [(node >> (5 * i)) & 0x1F for i in range(k)]
+                reach = node >> (5 * k)
+                occupied = sum(1 << pos for pos in positions)
+                for i, pos in enumerate(positions):
+                    for target in neighbors[pos]:
+                        if not (reach >> target) & 1:
+                            continue
+                        # The tile slides into the blank's region and leaves
+                        # the blank behind at its old cell
+                        positions[i] = target
+                        new_reach = region(pos, occupied ^ (1 << pos) ^ (1 << target))
+                        if mark(positions, new_reach, depth + 1):
+                            next_layer.append(pack(positions, new_reach))
+                        positions[i] = pos
+            layer = next_layer
+            depth += 1
+
+        write_table(self.path, table)
+
+    def distance(self, positions, blank_pos):
+        """Moves of pattern tiles needed, given each pattern tile's cell and
+        the blank's"""
+        return self.table[self.key(positions, blank_pos)]
+
+
+class AdditivePDB():
+    """Sum of disjoint pattern databases; call it on a packed state"""
+    def __init__(self, goal, partition=None, check=None):
+        self.goal = as_state(goal)
+        self.board = board_of(self.goal)
+        self.partition = tuple(tuple(p) for p in (partition or default_partition(self.goal)))
+        tiles = [tile for pattern in self.partition for tile in pattern]
+        if len(tiles) != len(set(tiles)) or 0 in tiles:
+            raise ValueError("Patterns must be disjoint and must not contain the blank")
+        self.databases = [PatternDatabase(self.goal, pattern, check=check) for pattern in self.partition]
+
+    def __call__(self, state):
+        board = self.board
+        bits, mask = board.bits, board.mask
+        where = [0] * board.cells
+        for i in range(board.cells):
+            where[(state >> (bits * i)) & mask] = i
+        blank = where[0]
+        return sum(db.table[db.key([where[tile] for tile in db.pattern], blank)] for db in self.databases)
+
+
+def default_partition(goal):
+    """Tiles in goal reading order, cut into groups of DEFAULT_GROUP[width]"""
+    goal = as_state(goal)
+    board = board_of(goal)
+    ordered = [tile for tile in board.tiles(goal) if tile != 0]
+    group = DEFAULT_GROUP.get(board.size, 4)
+    return [tuple(ordered[i:i + group]) for i in range(0, len(ordered), group)]
+
+
+_databases = {}
+
+
+def additive_pdb(goal, partition=None, check=None):
+    """Shared AdditivePDB for a goal and partition, built on first use (see
+    PatternDatabase for check)"""
+    key = (as_state(goal), None if partition is None else tuple(map(tuple, partition)))
+    pdb = _databases.get(key)
+    if pdb is None:
+        pdb = _databases[key] = AdditivePDB(goal, partition, check)
+    return pdb
+
+
+def pattern_database_distance(state, goal):
+    """Additive PDB heuristic with the default partition, for AStar_Algorithm"""
+    return additive_pdb(goal)(as_state(state))
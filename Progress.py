@@ -0,0 +1,167 @@
+import os
+import time
+
+# Every solver keeps a SearchStats and, when given a progress callback,
+# calls progress(stats) every PROGRESS_INTERVAL expansions. A callback may
+# raise SearchCancelled to abandon the search from inside the loop.
+PROGRESS_INTERVAL = 2000
+# Table builds, which expand nothing, call their `check` every
+# CHECK_INTERVAL nodes; a solver passes SearchStats.check so the progress
+# callback can cancel them too
+CHECK_INTERVAL = 1 << 14
+# With a Budget, expansions and frontier size are checked on every tick,
+# elapsed time and memory every BUDGET_INTERVAL ticks
+BUDGET_INTERVAL = 256
+
+
+class SearchCancelled(Exception):
+    """Raised from a progress callback to stop a running search"""
+
+
+class BudgetExceeded(Exception):
+    """Raised from SearchStats.tick() when a search runs past its Budget"""
+    def __init__(self, reason, limit, stats):
+        super().__init__(f"Search budget exceeded: {reason} limit {limit}")
+        self.reason = reason
+        self.limit = limit
+        self.stats = stats.as_dict()
+
+    def as_dict(self):
+        return {"reason": self.reason, "limit": self.limit, "stats": self.stats}
+
+
+def memory_in_use():
+    """Resident memory of this process in bytes, or None where unknown"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class Budget():
+    """Per-solve resource limits; None leaves a resource unlimited.
+
+    max_expansions  states expanded
+    max_frontier    states waiting in the frontier (SearchStats.frontier)
+    max_closed      states remembered as seen (SearchStats.closed)
+    max_memory      bytes of resident memory gained since the solve started,
+                    HDA*'s worker processes included
+    time_limit      wall-clock seconds since the solve started
+
+    A solver that reaches a limit stops and returns an unsolved Solution
+    (or the best one it has) with `exceeded` describing the limit and the
+    statistics at that point. Its moves lead to the most promising state
+    reached, where the solver can tell.
+    """
+    __slots__ = ("max_expansions", "max_frontier", "max_closed", "max_memory", "time_limit")
+
+    def __init__(self, max_expansions=None, max_frontier=None, max_closed=None, max_memory=None,
+                 time_limit=None):
+        if max_memory is not None and memory_in_use() is None:
+            raise ValueError("Memory budgets need /proc/self/statm, which this system lacks")
+        self.max_expansions = max_expansions
+        self.max_frontier = max_frontier
+        self.max_closed = max_closed
+        self.max_memory = max_memory
+        self.time_limit = time_limit
+
+    def check(self, stats, every=BUDGET_INTERVAL, extra_memory=0):
+        """Raise BudgetExceeded if stats are past a limit; called before each
+        expansion, or with every=1 by solvers that expand in bulk.
+        extra_memory counts bytes the search holds in other processes."""
+        if self.max_expansions is not None and stats.expanded >= self.max_expansions:
+            raise BudgetExceeded("expansions", self.max_expansions, stats)
+        if self.max_frontier is not None and stats.frontier > self.max_frontier:
+            raise BudgetExceeded("frontier", self.max_frontier, stats)
+        if self.max_closed is not None and stats.closed > self.max_closed:
+            raise BudgetExceeded("closed", self.max_closed, stats)
+        if stats.expanded % every == 0:
+            if self.time_limit is not None and stats.elapsed() > self.time_limit:
+                raise BudgetExceeded("time", self.time_limit, stats)
+            if (self.max_memory is not None
+                    and memory_in_use() + extra_memory - stats.start_memory > self.max_memory):
+                raise BudgetExceeded("memory", self.max_memory, stats)
+
+
+class SearchStats():
+    """Search counters with the same meaning in every algorithm.
+
+    expanded    states whose children were generated
+    generated   children produced by those expansions
+    duplicates  generated children dropped because the state was already
+                seen, closed, no cheaper, or the undo of the last move
+    frontier    states waiting to be expanded (queue, stack, open list,
+                or the current path for the depth-first searches)
+    closed      states remembered as seen: the visited set or g values,
+                frontier included (0 for IDS and IDA*, which keep only
+                their path)
+    depth       g of the state being expanded
+    bound       current depth limit (IDS) or f value / f bound (A*, IDA*)
+
+    The clock and the memory baseline start with start(), which a search
+    calls on its first next(), so a search created ahead of time is not
+    charged for waiting. Building a heuristic table on first use counts
+    against the budget's time and memory limits.
+    """
+    __slots__ = ("expanded", "generated", "duplicates", "frontier", "closed", "depth", "bound",
+                 "start_time", "progress", "budget", "start_memory")
+
+    def __init__(self, progress=None, budget=None):
+        self.expanded = 0
+        self.generated = 0
+        self.duplicates = 0
+        self.frontier = 0
+        self.closed = 0
+        self.depth = 0
+        self.bound = None
+        self.start_time = None
+        self.progress = progress
+        self.budget = budget
+        self.start_memory = None
+
+    def start(self):
+        """Start the clock and the memory baseline; later calls do nothing"""
+        if self.start_time is not None:
+            return
+        self.start_time = time.perf_counter()
+        if self.budget is not None and self.budget.max_memory is not None:
+            self.start_memory = memory_in_use()
+
+    def elapsed(self):
+        return 0.0 if self.start_time is None else time.perf_counter() - self.start_time
+
+    def rate(self):
+        """Expansions per second since the search started"""
+        elapsed = self.elapsed()
+        return self.expanded / elapsed if elapsed > 0 else 0.0
+
+    def tick(self):
+        """Count one expansion and report every PROGRESS_INTERVAL of them"""
+        if self.budget is not None:
+            self.budget.check(self)
+        self.expanded += 1
+        if self.progress is not None and self.expanded % PROGRESS_INTERVAL == 0:
+            self.progress(self)
+
+    def check(self):
+        """Report progress and check the budget during work that expands
+        nothing, such as building a heuristic table"""
+        if self.budget is not None:
+            self.budget.check(self, every=1)
+        if self.progress is not None:
+            self.progress(self)
+
+    def as_dict(self):
+        """Plain snapshot, safe to hand to another thread or process"""
+        return {
+            "expanded": self.expanded,
+            "generated": self.generated,
+            "duplicates": self.duplicates,
+            "frontier": self.frontier,
+            "closed": self.closed,
+            "depth": self.depth,
+            "bound": self.bound,
+            "elapsed": self.elapsed(),
+            "rate": self.rate(),
+        }
@@ -0,0 +1,128 @@
+from array import array
+from math import factorial
+from State import board_of
+
+# Perfect hash for packed states: blank index * (T!/2) + the Lehmer code of
+# the T remaining tiles read as a factorial-base number. With the blank held
+# fixed, every state in one reachability class has the same tile inversion
+# parity, so the second-to-last Lehmer digit (the one that carries the
+# parity) is implied and dropping it folds T! codes onto T!/2 dense ranks.
+#
+# Ranks are only dense enough to back flat arrays for small boards: the
+# 8-puzzle has 181,440 of them, the 15-puzzle ~10^13. StateIndex hides the
+# difference from the solvers.
+DENSE_LIMIT = 1 << 24
+
+
+class BitSet:
+    """Fixed-size set of ranks backed by a bytearray, one bit per state"""
+    __slots__ = ("bits", "count")
+
+    def __init__(self, size):
+        self.bits = bytearray((size + 7) >> 3)
+        self.count = 0
+
+    def add(self, i):
+        byte = i >> 3
+        bit = 1 << (i & 7)
+        if not self.bits[byte] & bit:
+            self.bits[byte] |= bit
+            self.count += 1
+
+    def __contains__(self, i):
+        return bool(self.bits[i >> 3] & (1 << (i & 7)))
+
+    def __len__(self):
+        return self.count
+
+
+class SparseBytes(dict):
+    """dict stand-in for a zero-filled bytearray/array indexed by packed state"""
+    def __missing__(self, key):
+        return 0
+
+
+class StateIndex():
+    """Maps packed states to container keys for one board width.
+
+    key() is the dense rank and the containers are BitSet/bytearray when the
+    rank space fits in DENSE_LIMIT; otherwise key() is the packed state
+    itself and the containers are a set and a SparseBytes.
+    """
+    def __init__(self, board):
+        self.board = board
+        self.tiles = board.cells - 1
+        self.tile_codes = factorial(self.tiles) // 2
+        self.states = board.cells * self.tile_codes
+        self.half_factorials = tuple(factorial(self.tiles - 1 - i) // 2 for i in range(self.tiles - 2))
+        self.dense = self.states <= DENSE_LIMIT
+        self.key = self.rank if self.dense else _identity
+
+    def rank(self, state):
+        """Map a packed state to 0 .. states-1 (unique within a parity class)"""
+        board = self.board
+        bits, mask = board.bits, board.mask
+        blank_pos = board.blank(state)
+        half_factorials = self.half_factorials
+        last = self.tiles - 2
+        used = 0
+        r = 0
+        k = 0
+        for i in range(board.cells):
+            if i == blank_pos:
+                continue
+            value = (state >> (bits * i)) & mask
+            r += (value - 1 - (used & ((1 << value) - 1)).bit_count()) * half_factorials[k]
+            used |= 1 << value
+            k += 1
+            if k == last:
+                break
+        return blank_pos * self.tile_codes + r
+
+    def unrank(self, r, state_parity=0):
+        """Inverse of rank() for the states whose board parity equals state_parity"""
+        board = self.board
+        blank_pos, half = divmod(r, self.tile_codes)
+        if not 0 <= blank_pos < board.cells:
+            raise ValueError(f"Rank {r} out of range")
+        cells = [i for i in range(board.cells) if i != blank_pos]
+        for low in (0, 1):
+            code = 2 * half + low
+            remaining = list(range(1, board.cells))
+            state = (blank_pos << board.blank_shift) | board.sentinel
+            for k, i in enumerate(cells):
+                digit, code = divmod(code, factorial(self.tiles - 1 - k))
+                state |= remaining.pop(digit) << (board.bits * i)
+            if board.parity(state) == state_parity:
+                return state
+        raise ValueError(f"Rank {r} out of range")
+
+    def new_set(self):
+        return BitSet(self.states) if self.dense else set()
+
+    def new_array(self, typecode="B"):
+        """Zero-filled entry per state, of an array module typecode"""
+        if not self.dense:
+            return SparseBytes()
+        if typecode == "B":
+            return bytearray(self.states)
+        return array(typecode, bytes(array(typecode).itemsize * self.states))
+
+
+def _identity(state):
+    return state
+
+
+_indexes = {}
+
+
+def get_index(board):
+    """Shared StateIndex for a Board"""
+    index = _indexes.get(board.size)
+    if index is None:
+        index = _indexes[board.size] = StateIndex(board)
+    return index
+
+
+def rank(state):
+    return get_index(board_of(state)).rank(state)
@@ -0,0 +1,106 @@
+import numpy as np
+from State import as_state, board_of, MOVE_NAMES, DIRECTIONS
+
+
+class Solution():
+    """A solver's answer: the start state and its moves, one byte per move.
+
+    Boards are produced on demand. solution[i] is the board after i moves
+    and boards() stacks every step into one contiguous (L, n, n) uint8
+    array, so a 60,000-move DFS answer costs 60 KB until it is drawn. An
+    unsolved search has solved False and no boards.
+
+    A search stopped by its Progress.Budget sets `exceeded` to the limit it
+    hit and the statistics at that point. Its moves, if any, lead to the
+    most promising state it reached, or form the best solution found so far
+    when solved is True.
+    """
+    __slots__ = ("start", "moves", "solved", "nodes_expanded", "depth", "checkpoints", "exceeded")
+    # Random access walks from the nearest state cached every CHECKPOINT moves
+    CHECKPOINT = 256
+
+    def __init__(self, start, moves=b"", solved=True, nodes_expanded=0, depth=None, exceeded=None):
+        self.start = as_state(start)
+        self.moves = bytes(moves)
+        self.solved = solved
+        self.nodes_expanded = nodes_expanded
+        self.depth = len(self.moves) if depth is None else depth
+        self.checkpoints = None
+        self.exceeded = exceeded
+
+    @classmethod
+    def unsolved(cls, start, nodes_expanded=0, depth=0):
+        return cls(start, b"", False, nodes_expanded, depth)
+
+    def reached(self):
+        """Packed state at the end of the moves, e.g. of a partial result"""
+        board, state = self.board, self.start
+        for move in self.moves:
+            state = board.apply_move(state, move)
+        return state
+
+    @property
+    def board(self):
+        return board_of(self.start)
+
+    @property
+    def cost(self):
+        return len(self.moves) if self.solved else 0
+
+    def __len__(self):
+        return len(self.moves) + 1 if self.solved else 0
+
+    def move_names(self):
+        return [MOVE_NAMES[move] for move in self.moves]
+
+    def states(self):
+        """Packed states from start to goal"""
+        if not self.solved:
+            return
+        board, state = self.board, self.start
+        yield state
+        for move in self.moves:
+            state = board.apply_move(state, move)
+            yield state
+
+    def state(self, i):
+        """Packed state after i moves"""
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"Step {i} out of range for {len(self)} boards")
+        if self.checkpoints is None:
+            self.checkpoints = [state for k, state in enumerate(self.states()) if k % self.CHECKPOINT == 0]
+        board = self.board
+        base = i - i % self.CHECKPOINT
+        state = self.checkpoints[base // self.CHECKPOINT]
+        for move in self.moves[base:i]:
+            state = board.apply_move(state, move)
+        return state
+
+    def __getitem__(self, i):
+        board = self.board
+        return np.array(board.tiles(self.state(i)), dtype=np.uint8).reshape(board.size, board.size)
+
+    def boards(self):
+        """Every board on the path as one (L, n, n) uint8 array"""
+        board = self.board
+        size = board.size
+        if not self.solved:
+            return np.empty((0, size, size), dtype=np.uint8)
+        offsets = [dx * size + dy for dx, dy in DIRECTIONS]
+        tiles = bytearray(board.tiles(self.start))
+        blank = board.blank(self.start)
+        steps = bytearray(tiles)
+        for move in self.moves:
+            target = blank + offsets[move]
+            tiles[blank] = tiles[target]
+            tiles[target] = 0
+            blank = target
+            steps += tiles
+        return np.frombuffer(steps, dtype=np.uint8).reshape(-1, size, size)
+
+    def as_tuple(self):
+        """The older (path, cost, nodes_expanded, depth, moves) tuple, with path
+        as a list of boards"""
+        return list(self.boards()), self.cost, self.nodes_expanded, self.depth, self.move_names()
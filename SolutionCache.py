@@ -0,0 +1,159 @@
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from State import MOVE_NAMES, as_state
+from DistanceTable import TABLE_DIR
+from Canonical import canonical
+from Solution import Solution
+from Solvers import CANONICAL_GOAL
+
+# Solved puzzles keyed by (start, goal, algorithm), with start and goal in
+# canonical form (see Canonical.py) so equivalent goals share entries and
+# moves are stored in the canonical frame. Solvers that do not run against
+# the canonical goal (Solvers.CANONICAL_GOAL), such as DFS, find different
+# paths for equivalent goals, so their entries stay in the caller's frame.
+# A small in-memory LRU
+# sits in front of a SQLite file that persists across runs; both tiers
+# evict least recently used entries past their size limit. A record is
+# {"solved", "cost", "nodes_expanded", "depth", "moves", "time"} as first
+# measured, and the board path is rebuilt from the moves on the way out.
+
+DEFAULT_PATH = os.path.join(TABLE_DIR, "solutions.sqlite")
+MEMORY_SIZE = 1024
+DISK_SIZE = 100000
+# Bumped whenever stored keys or moves change meaning; older files are reset
+SCHEMA_VERSION = 3
+# Disk eviction runs after this many inserts rather than on every one
+EVICT_EVERY = 100
+
+MOVE_LETTERS = "".join(name[0] for name in MOVE_NAMES)
+RECORD_FIELDS = ("solved", "cost", "nodes_expanded", "depth", "moves", "time")
+
+
+class SolutionCache():
+    """Two-tier (LRU dict, then SQLite) cache of solver results.
+
+    Safe to share between threads; each process should open its own.
+    The disk tier lives under tables/ unless a path (or ":memory:") is given.
+    """
+    def __init__(self, path=None, memory_size=MEMORY_SIZE, disk_size=DISK_SIZE):
+        self.path = path or DEFAULT_PATH
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.inserts = 0
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self.db:
+            if self.db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                self.db.execute("DROP TABLE IF EXISTS solutions")
+                self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.db.execute("""CREATE TABLE IF NOT EXISTS solutions (
+                start TEXT, goal TEXT, algorithm TEXT,
+                solved INTEGER, moves TEXT, cost INTEGER, nodes_expanded INTEGER, depth INTEGER, time REAL,
+                last_used REAL,
+                PRIMARY KEY (start, goal, algorithm))""")
+            self.db.execute("CREATE INDEX IF NOT EXISTS solutions_last_used ON solutions (last_used)")
+
+    @staticmethod
+    def mapping(goal, algorithm):
+        """Canonical mapping of the frame an algorithm's entries are kept in,
+        or None for the caller's own frame"""
+        return canonical(goal) if algorithm in CANONICAL_GOAL else None
+
+    @classmethod
+    def key(cls, start, goal, algorithm):
+        mapping = cls.mapping(goal, algorithm)
+        if mapping is None:
+            return f"{as_state(start):x}", f"{as_state(goal):x}", algorithm
+        return f"{mapping.to_canonical(start):x}", f"{mapping.goal:x}", algorithm
+
+    def get(self, start, goal, algorithm):
+        """The cached record in the caller's frame, or None on a miss"""
+        record = self.lookup(self.key(start, goal, algorithm))
+        mapping = self.mapping(goal, algorithm)
+        if record is None:
+            return None
+        if mapping is None:
+            return dict(record)
+        return dict(record, moves=mapping.moves_from_canonical(record["moves"]))
+
+    def lookup(self, key):
+        with self.lock:
+            record = self.memory.get(key)
+            if record is not None:
+                self.memory.move_to_end(key)
+                return record
+            with self.db:
+                row = self.db.execute(
+                    "SELECT solved, moves, cost, nodes_expanded, depth, time FROM solutions "
+                    "WHERE start = ? AND goal = ? AND algorithm = ?", key).fetchone()
+                if row is None:
+                    return None
+                self.db.execute("UPDATE solutions SET last_used = ? WHERE start = ? AND goal = ? AND algorithm = ?",
+                                (time.time(),) + key)
+            solved, moves, cost, nodes_expanded, depth, elapsed = row
+            record = {"solved": bool(solved), "cost": cost, "nodes_expanded": nodes_expanded, "depth": depth,
+                      "moves": [MOVE_NAMES[MOVE_LETTERS.index(c)] for c in moves], "time": elapsed}
+            self.remember(key, record)
+            return record
+
+    def put(self, start, goal, algorithm, record):
+        key = self.key(start, goal, algorithm)
+        record = {field: record[field] for field in RECORD_FIELDS}
+        mapping = self.mapping(goal, algorithm)
+        if mapping is not None:
+            record["moves"] = mapping.moves_to_canonical(record["moves"])
+        moves = "".join(move[0] for move in record["moves"])
+        with self.lock:
+            self.remember(key, record)
+            with self.db:
+                self.db.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                key + (record["solved"], moves, record["cost"], record["nodes_expanded"],
+                                       record["depth"], record["time"], time.time()))
+                self.inserts += 1
+                if self.inserts % EVICT_EVERY == 0:
+                    self.evict()
+
+    def remember(self, key, record):
+        self.memory[key] = record
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def evict(self):
+        """Drop the least recently used rows beyond disk_size"""
+        self.db.execute("DELETE FROM solutions WHERE rowid IN "
+                        "(SELECT rowid FROM solutions ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                        (self.disk_size,))
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            with self.db:
+                self.db.execute("DELETE FROM solutions")
+
+    def close(self):
+        with self.lock:
+            if self.inserts % EVICT_EVERY:
+                with self.db:
+                    self.evict()
+            self.db.close()
+
+
+def record_of(solution, elapsed):
+    """Cache record for a Solution"""
+    return {"solved": solution.solved, "cost": solution.cost, "nodes_expanded": solution.nodes_expanded,
+            "depth": solution.depth, "moves": solution.move_names(), "time": elapsed}
+
+
+def replay(start, record):
+    """Rebuild the Solution a record was made from"""
+    if not record["solved"]:
+        return Solution.unsolved(start, record["nodes_expanded"], record["depth"])
+    moves = bytes(MOVE_NAMES.index(name) for name in record["moves"])
+    return Solution(start, moves, True, record["nodes_expanded"], record["depth"])
@@ -0,0 +1,186 @@
+from BFS import BFS
+from DFS import DFS
+from IDS import IDS
+from ASTAR import AStar, manhattan_distance, euclidean_distance
+from IDASTAR import IDAStar
+from HDASTAR import HDAStar
+import DistanceTable
+import PatternDB
+from Canonical import canonical
+from Solution import Solution
+from Progress import SearchStats, BudgetExceeded
+from State import get_board
+from Stream import finish
+
+# A solver is any callable solve(matrix, goal, progress=None, trace=None,
+# budget=None) -> Solution. `progress` is the SearchStats callback from
+# Progress.py, `trace` an optional Trace.TraceWriter for the search and
+# `budget` an optional Progress.Budget.
+# SOLVERS maps the names used by the GUI, the CLI and the benchmark to
+# registered solvers, all but DFS wrapped so they run against the goal's
+# canonical form. STREAMS holds the same searches as generators with the
+# same arguments (see Stream.py), and SOLVERS[name] runs STREAMS[name] to
+# the end.
+
+# Weight of the "wastar" solvers and time budget in seconds of the "arastar"
+# ones; both trade optimality for speed on boards too big to solve exactly
+WEIGHT = 2
+ANYTIME_LIMIT = 1.0
+
+# Heuristics read from a table, and the loader that builds it on first use.
+# Searches load the table before their first expansion, passing the
+# solver's SearchStats.check, so a first-time build reports progress, can
+# be cancelled like the search itself and counts against its budget.
+TABLES = {
+    DistanceTable.exact_distance: DistanceTable.load,
+    PatternDB.pattern_database_distance: PatternDB.additive_pdb,
+}
+
+
+def with_tables(heuristic_function, goal, search, stream):
+    """Run `stream`, one of search's stream methods, once the heuristic's
+    table is loaded. A budget that runs out during the build ends it with an
+    unsolved Solution, as the search would."""
+    load = TABLES.get(heuristic_function)
+    if load is not None:
+        search.stats.start()
+        try:
+            load(goal, check=search.stats.check)
+        except BudgetExceeded as exceeded:
+            stream.close()
+            yield exceeded_before_search(search.matrix, exceeded)
+            return
+    yield from stream
+
+
+def exceeded_before_search(matrix, exceeded):
+    """Unsolved Solution for a budget spent before the first expansion"""
+    solution = Solution.unsolved(get_board(len(matrix)).encode(matrix))
+    solution.exceeded = exceeded.as_dict()
+    return solution
+
+
+def stream_bfs(matrix, goal, progress=None, trace=None, budget=None):
+    return BFS(matrix, goal, progress=progress, trace=trace, budget=budget).stream()
+
+
+def stream_layered_bfs(matrix, goal, progress=None, trace=None, budget=None):
+    return BFS(matrix, goal, progress=progress, budget=budget).stream_layered()
+
+
+def stream_bidirectional_bfs(matrix, goal, progress=None, trace=None, budget=None):
+    return BFS(matrix, goal, progress=progress, trace=trace, budget=budget).stream_bidirectional()
+
+
+def stream_dfs(matrix, goal, progress=None, trace=None, budget=None):
+    return DFS(matrix, goal, progress=progress, trace=trace, budget=budget).stream()
+
+
+def stream_ids(matrix, goal, progress=None, trace=None, budget=None):
+    return IDS(matrix, goal, progress=progress, trace=trace, budget=budget).stream()
+
+
+def stream_table(matrix, goal, progress=None, trace=None, budget=None):
+    stats = SearchStats(progress, budget)
+    stats.start()
+    try:
+        table = DistanceTable.load(goal, check=stats.check)
+    except BudgetExceeded as exceeded:
+        yield exceeded_before_search(matrix, exceeded)
+        return
+    yield table.solution(matrix)
+
+
+def astar(heuristic_function):
+    def run(matrix, goal, progress=None, trace=None, budget=None):
+        search = AStar(matrix, goal, progress=progress, trace=trace, budget=budget)
+        return with_tables(heuristic_function, goal, search, search.stream(heuristic_function))
+    return run
+
+
+def weighted_astar(heuristic_function, weight):
+    def run(matrix, goal, progress=None, trace=None, budget=None):
+        search = AStar(matrix, goal, progress=progress, trace=trace, budget=budget)
+        return with_tables(heuristic_function, goal, search, search.stream(heuristic_function, weight))
+    return run
+
+
+def anytime_astar(heuristic_function, time_limit=ANYTIME_LIMIT):
+    def run(matrix, goal, progress=None, trace=None, budget=None):
+        search = AStar(matrix, goal, progress=progress, trace=trace, budget=budget)
+        return with_tables(heuristic_function, goal, search,
+                           search.stream_anytime(heuristic_function, time_limit=time_limit))
+    return run
+
+
+def hdastar(heuristic_function):
+    # Trace recording is per process and not supported here
+    def run(matrix, goal, progress=None, trace=None, budget=None):
+        search = HDAStar(matrix, goal, progress=progress, budget=budget)
+        return with_tables(heuristic_function, goal, search, search.stream(heuristic_function))
+    return run
+
+
+def idastar(heuristic_function):
+    def run(matrix, goal, progress=None, trace=None, budget=None):
+        search = IDAStar(matrix, goal, progress=progress, trace=trace, budget=budget)
+        return with_tables(heuristic_function, goal, search, search.stream(heuristic_function))
+    return run
+
+
+def through_canonical_goal(stream):
+    """Search against the goal's canonical form and map the Solution back, so
+    tables, pattern databases and caches are built for one goal only"""
+    def search(matrix, goal, progress=None, trace=None, budget=None):
+        mapping = canonical(goal)
+        board = mapping.board
+        start = board.decode(mapping.to_canonical(board.encode(matrix)))
+        for event in stream(start, board.decode(mapping.goal), progress, trace, budget):
+            if isinstance(event, Solution):
+                event = mapping.solution_from_canonical(event)
+            yield event
+    return search
+
+
+def to_completion(search):
+    def solve(matrix, goal, progress=None, trace=None, budget=None):
+        return finish(search(matrix, goal, progress, trace, budget))
+    return solve
+
+
+SOLVERS = {}
+STREAMS = {}
+CANONICAL_GOAL = set()  # names of the solvers run against the canonical goal
+
+
+def register(name, stream, canonical_goal=True):
+    """Add a search generator under `name`; it is called with the canonical
+    goal unless canonical_goal is False"""
+    STREAMS[name] = through_canonical_goal(stream) if canonical_goal else stream
+    if canonical_goal:
+        CANONICAL_GOAL.add(name)
+    SOLVERS[name] = to_completion(STREAMS[name])
+    return stream
+
+
+register("bfs", stream_bfs)
+register("bidirectional-bfs", stream_bidirectional_bfs)
+register("layered-bfs", stream_layered_bfs)
+# DFS uses no tables, and its path depends on the neighbour order, which a
+# symmetry of the board would permute, so it runs in the caller's frame
+register("dfs", stream_dfs, canonical_goal=False)
+register("ids", stream_ids)
+register("astar-manhattan", astar(manhattan_distance))
+register("astar-euclidean", astar(euclidean_distance))
+register("astar-exact", astar(DistanceTable.exact_distance))
+register("astar-pdb", astar(PatternDB.pattern_database_distance))
+register("wastar-manhattan", weighted_astar(manhattan_distance, WEIGHT))
+register("wastar-pdb", weighted_astar(PatternDB.pattern_database_distance, WEIGHT))
+register("arastar-manhattan", anytime_astar(manhattan_distance))
+register("arastar-pdb", anytime_astar(PatternDB.pattern_database_distance))
+register("hdastar-manhattan", hdastar(manhattan_distance))
+register("hdastar-pdb", hdastar(PatternDB.pattern_database_distance))
+register("idastar-manhattan", idastar(manhattan_distance))
+register("idastar-euclidean", idastar(euclidean_distance))
+register("idastar-pdb", idastar(PatternDB.pattern_database_distance))
+register("table", stream_table)
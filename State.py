@@ -0,0 +1,171 @@
+import numpy as np
+
+# A board is packed into a single int: cell i (row-major) lives in bits
+# bits*i .. bits*i+bits-1, the blank's index sits above the cells so the
+# solvers never have to scan for the zero tile, and a sentinel bit on top
+# makes state.bit_length() identify the board width.
+
+# Moves are named after the direction the blank travels.
+UP, DOWN, LEFT, RIGHT = 0, 1, 2, 3
+MOVE_NAMES = ("Up", "Down", "Left", "Right")
+DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+def inverse(move):
+    return move ^ 1
+
+
+class Board():
+    """Geometry and precomputed move tables for a size x size puzzle"""
+    def __init__(self, size):
+        self.size = size
+        self.cells = size * size
+        self.bits = max(4, (self.cells - 1).bit_length())
+        self.mask = (1 << self.bits) - 1
+        self.blank_shift = self.bits * self.cells
+        self.cell_mask = (1 << self.blank_shift) - 1
+        self.blank_mask = (1 << (self.cells - 1).bit_length()) - 1
+        self.sentinel = 1 << (self.blank_shift + (self.cells - 1).bit_length())
+        self.goal = self.encode(np.arange(self.cells))
+
+        # MOVES[blank] -> ((target, move, shift, factor, field), ...): the tile
+        # at target is read from `shift`, multiplied by `factor` to move it
+        # into the blank's cell, and `field` is the new blank/sentinel bits.
+        moves = []
+        for pos in range(self.cells):
+            x, y = divmod(pos, size)
+            row = []
+            for move, (dx, dy) in enumerate(DIRECTIONS):
+                new_x, new_y = x + dx, y + dy
+                if 0 <= new_x < size and 0 <= new_y < size:
+                    target = new_x * size + new_y
+                    factor = (1 << (self.bits * pos)) - (1 << (self.bits * target))
+                    field = (target << self.blank_shift) | self.sentinel
+                    row.append((target, move, self.bits * target, factor, field))
+            moves.append(tuple(row))
+        self.moves = tuple(moves)
+        # TARGETS[blank][move] -> index into MOVES[blank], or -1 when illegal
+        self.targets = tuple(
+            tuple(next((k for k, entry in enumerate(row) if entry[1] == move), -1) for move in range(4))
+            for row in self.moves
+        )
+
+    def encode(self, matrix):
+        """Pack a board (array or nested list) into an int"""
+        state = 0
+        blank_pos = 0
+        for i, value in enumerate(np.asarray(matrix).flatten()):
+            value = int(value)
+            if value == 0:
+                blank_pos = i
+            state |= value << (self.bits * i)
+        return state | (blank_pos << self.blank_shift) | self.sentinel
+
+    def decode(self, state):
+        """Unpack a state back into a size x size NumPy array"""
+        return np.array(self.tiles(state)).reshape(self.size, self.size)
+
+    def blank(self, state):
+        return (state >> self.blank_shift) & self.blank_mask
+
+    def tile(self, state, pos):
+        return (state >> (self.bits * pos)) & self.mask
+
+    def tiles(self, state):
+        return [(state >> (self.bits * i)) & self.mask for i in range(self.cells)]
+
+    def children(self, state):
+        """Yield (child, move) for every legal blank move"""
+        cells = state & self.cell_mask
+        mask = self.mask
+        for _, move, shift, factor, field in self.moves[(state >> self.blank_shift) & self.blank_mask]:
+            yield (cells + ((state >> shift) & mask) * factor) | field, move
+
+    def ordered_children(self, order):
+        """A children() function that yields moves in `order`, a permutation
+        of UP, DOWN, LEFT, RIGHT"""
+        rows = tuple(tuple(sorted(row, key=lambda entry: order.index(entry[1]))) for row in self.moves)
+        cell_mask, mask = self.cell_mask, self.mask
+        blank_shift, blank_mask = self.blank_shift, self.blank_mask
+
+        def children(state):
+            cells = state & cell_mask
+            for _, move, shift, factor, field in rows[(state >> blank_shift) & blank_mask]:
+                yield (cells + ((state >> shift) & mask) * factor) | field, move
+        return children
+
+    def apply_move(self, state, move):
+        blank_pos = self.blank(state)
+        k = self.targets[blank_pos][move]
+        if k < 0:
+            raise ValueError(f"Illegal move {MOVE_NAMES[move]} from blank at {blank_pos}")
+        _, _, shift, factor, field = self.moves[blank_pos][k]
+        return ((state & self.cell_mask) + ((state >> shift) & self.mask) * factor) | field
+
+    def move_between(self, state1, state2):
+        """Direction the blank moved going from state1 to state2"""
+        diff = self.blank(state2) - self.blank(state1)
+        if diff == -self.size:
+            return UP
+        elif diff == self.size:
+            return DOWN
+        elif diff == -1:
+            return LEFT
+        elif diff == 1:
+            return RIGHT
+        return None
+
+    def parity(self, state):
+        """Reachability invariant: two states are mutually reachable iff equal.
+
+        Tile inversion parity, plus the blank's row when the width is even
+        (a vertical move then shifts a tile past an odd number of others).
+        """
+        seen = 0
+        inversions = 0
+        for i in range(self.cells):
+            value = (state >> (self.bits * i)) & self.mask
+            if value:
+                inversions += (seen >> value).bit_count()
+                seen |= 1 << value
+        if self.size % 2 == 0:
+            inversions += self.blank(state) // self.size
+        return inversions & 1
+
+    def solvable(self, start, goal=None):
+        return self.parity(start) == self.parity(self.goal if goal is None else goal)
+
+
+_boards = {}
+_boards_by_length = {}
+
+
+def get_board(size):
+    """Shared Board for a width, built on first use"""
+    board = _boards.get(size)
+    if board is None:
+        board = _boards[size] = Board(size)
+        _boards_by_length[board.sentinel.bit_length()] = board
+    return board
+
+
+def board_of(board):
+    """The Board a packed state or a square array belongs to"""
+    if isinstance(board, int):
+        return _boards_by_length[board.bit_length()]
+    return get_board(len(board))
+
+
+def encode(matrix):
+    return get_board(len(matrix)).encode(matrix)
+
+
+def as_state(board):
+    """Accept either a packed state or a board array"""
+    if isinstance(board, int):
+        return board
+    return encode(board)
+
+
+def decode(state):
+    return board_of(state).decode(state)
@@ -0,0 +1,97 @@
+import asyncio
+import functools
+import itertools
+from collections import deque
+from Solution import Solution
+from Progress import BudgetExceeded
+
+# Every solver also exposes its search as a generator (BFS.stream(),
+# AStar.stream(h), Solvers.STREAMS[name](matrix, goal), ...). Nothing runs
+# until the first next(). It then yields one event per expanded state and
+# finally the Solution. An event is the packed state just expanded, or None
+# from solvers that do not expand one state at a time (layered BFS yields
+# once per layer, HDA* once per poll of its workers). Searches from STREAMS
+# yield states in the canonical goal's frame (except DFS), as traces do.
+# Stopping early is just not asking for more; close() releases a search at
+# once.
+#
+# The helpers below drive such generators: to the end, in slices, several
+# of them round-robin on one thread, or from an asyncio task.
+#
+# A search given a Progress.Budget stops itself: SearchStats.tick() raises
+# BudgetExceeded, and stream methods wrapped in within_budget turn that into
+# the solver's partial(last) Solution, `last` being the last state yielded.
+# The wrapper also starts the search's clock, on the first next().
+
+SLICE = 1000  # events per turn for time_share() and solve_async()
+
+
+def within_budget(stream):
+    """Decorator for solver stream methods: end on BudgetExceeded with the
+    solver's partial result instead of raising"""
+    @functools.wraps(stream)
+    def search(self, *args, **kwargs):
+        last = None
+        self.stats.start()
+        try:
+            for event in stream(self, *args, **kwargs):
+                if not isinstance(event, Solution):
+                    last = event
+                yield event
+        except BudgetExceeded as exceeded:
+            solution = self.partial(last)
+            solution.exceeded = exceeded.as_dict()
+            yield solution
+    return search
+
+
+def finish(search):
+    """Run a search to the end and return its Solution"""
+    event = None
+    for event in search:
+        pass
+    return event
+
+
+def advance(search, steps=SLICE):
+    """Run up to `steps` events: the Solution if the search ended, else None"""
+    for event in itertools.islice(search, steps):
+        if isinstance(event, Solution):
+            return event
+    return None
+
+
+def time_share(searches, steps=SLICE):
+    """Interleave many searches on this thread, `steps` events at a time.
+
+    searches maps a key to a search generator; (key, Solution) pairs are
+    yielded as searches finish, cheapest first. Searches still pending when
+    the caller stops iterating are closed.
+    """
+    pending = deque(searches.items())
+    try:
+        while pending:
+            key, search = pending.popleft()
+            solution = advance(search, steps)
+            if solution is None:
+                pending.append((key, search))
+            else:
+                yield key, solution
+    finally:
+        for _, search in pending:
+            search.close()
+
+
+async def solve_async(search, steps=SLICE):
+    """Drive a search from asyncio, yielding to the event loop between slices.
+
+    Cancelling the awaiting task closes the search.
+    """
+    try:
+        while True:
+            solution = advance(search, steps)
+            if solution is not None:
+                return solution
+            await asyncio.sleep(0)
+    finally:
+        search.close()
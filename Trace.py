@@ -0,0 +1,203 @@
+import os
+import mmap
+import struct
+from collections import namedtuple
+import numpy as np
+from State import as_state, board_of, get_board
+from Rank import get_index
+
+# A trace is a fixed-width binary log of what one search did, written
+# through a memory map so recording costs a struct.pack_into per event.
+#
+#   header  magic, board width, record count, start, goal
+#   record  state, parent (0 for none), g, h, event
+#
+# States are stored as their packed cell bits (State.py without the blank
+# index and sentinel): one mask per record instead of a Rank.py rank, which
+# would cost more than the search step being traced. That is 36 bits for
+# the 8-puzzle and exactly 64 for the 15-puzzle, the widest board a trace
+# holds. No state has all-zero cells, so 0 marks a missing parent; ranks
+# are available from TraceReader.rank(). TraceReader streams records back
+# without loading the file, and array() exposes them as a NumPy memmap for
+# offline analysis. Searches run through Solvers.SOLVERS record states in
+# the canonical goal's frame (see Canonical.py), except DFS.
+
+MAGIC = b"PZTRACE1"
+HEADER = struct.Struct("<8sHxxIQQ")
+RECORD = struct.Struct("<QQIfB3x")
+RECORD_DTYPE = np.dtype({
+    "names": ["state", "parent", "g", "h", "event"],
+    "formats": ["<u8", "<u8", "<u4", "<f4", "u1"],
+    "offsets": [0, 8, 16, 20, 24],
+    "itemsize": RECORD.size,
+})
+
+# Event types
+EXPAND = 0      # children of the state are about to be generated
+GENERATE = 1    # a child kept for later expansion (new or cheaper)
+GOAL = 2        # the goal was reached
+BOUND = 3       # IDS / IDA* started a new pass; h holds the depth or f bound
+EVENT_NAMES = ("expand", "generate", "goal", "bound")
+
+# The file grows by doubling from this many records
+INITIAL_RECORDS = 1 << 16
+
+TraceRecord = namedtuple("TraceRecord", ("state", "parent", "g", "h", "event"))
+
+
+class TraceWriter():
+    """Appends trace records to a memory-mapped file.
+
+    Hand one to a solver (trace=...) and it calls begin() when the search
+    starts and record() for every event. close() trims the file to the
+    records written.
+    """
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.file = open(path, "w+b")
+        self.map = None
+        self.capacity = 0
+        self.count = 0
+        self.size = 0
+        self.start = self.goal = 0
+        self.cell_mask = 0
+
+    def begin(self, start, goal):
+        """Start a new trace for a search from start to goal, dropping old records"""
+        start, goal = as_state(start), as_state(goal)
+        board = board_of(start)
+        if board.blank_shift > 64:
+            raise ValueError(f"Cannot trace {board.size}x{board.size} boards: states do not fit in 64 bits")
+        self.size = board.size
+        self.cell_mask = board.cell_mask
+        self.start, self.goal = start & self.cell_mask, goal & self.cell_mask
+        self.count = 0
+        if self.map is None:
+            self.grow(INITIAL_RECORDS)
+
+    def grow(self, capacity):
+        if self.map is not None:
+            self.map.close()
+        self.file.truncate(HEADER.size + capacity * RECORD.size)
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        self.capacity = capacity
+
+    def record(self, event, state, parent=None, g=0, h=0):
+        if self.count == self.capacity:
+            self.grow(self.capacity * 2)
+        cell_mask = self.cell_mask
+        RECORD.pack_into(self.map, HEADER.size + self.count * RECORD.size,
+                         state & cell_mask, 0 if parent is None else parent & cell_mask, g, h, event)
+        self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        if self.file.closed:
+            return
+        if self.map is not None:
+            HEADER.pack_into(self.map, 0, MAGIC, self.size, self.count, self.start, self.goal)
+            self.map.flush()
+            self.map.close()
+            self.map = None
+        self.file.truncate(HEADER.size + self.count * RECORD.size)
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TraceReader():
+    """Streams the records of a trace file through a read-only memory map"""
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.map) < HEADER.size:
+            raise ValueError(f"{path} is not a search trace")
+        magic, self.size, self.count, start, goal = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a search trace")
+        if len(self.map) < HEADER.size + self.count * RECORD.size:
+            raise ValueError(f"{path} is truncated")
+        self.board = get_board(self.size)
+        self.index = get_index(self.board)
+        self.start = self.state(start)
+        self.goal = self.state(goal)
+
+    def state(self, cells):
+        """Packed state for the cell bits stored in this trace, None for 0"""
+        if not cells:
+            return None
+        board = self.board
+        mask = board.mask
+        for i in range(board.cells):
+            if not (cells >> (board.bits * i)) & mask:
+                return cells | (i << board.blank_shift) | board.sentinel
+        raise ValueError(f"{cells:#x} has no blank")
+
+    def rank(self, cells):
+        """Rank.py rank of a stored state, e.g. to index per-state arrays"""
+        return self.index.rank(self.state(cells))
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(f"Record {i} out of range for {self.count} records")
+        return TraceRecord._make(RECORD.unpack_from(self.map, HEADER.size + i * RECORD.size))
+
+    def records(self, start=0, stop=None, event=None, chunk=INITIAL_RECORDS):
+        """Yield TraceRecords in order, optionally only those of one event type.
+
+        The map is unpacked chunk records at a time, so memory stays flat
+        however long the trace is.
+        """
+        stop = self.count if stop is None else min(stop, self.count)
+        view = memoryview(self.map)
+        try:
+            for first in range(start, stop, chunk):
+                last = min(first + chunk, stop)
+                block = view[HEADER.size + first * RECORD.size:HEADER.size + last * RECORD.size]
+                for record in map(TraceRecord._make, RECORD.iter_unpack(block)):
+                    if event is None or record.event == event:
+                        yield record
+                block.release()
+        finally:
+            view.release()
+
+    def __iter__(self):
+        return self.records()
+
+    def expansions(self):
+        """Expanded states in the order the search expanded them"""
+        for record in self.records(event=EXPAND):
+            yield self.state(record.state)
+
+    def array(self):
+        """All records as a read-only structured NumPy memmap (RECORD_DTYPE)"""
+        if self.count == 0:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return np.memmap(self.path, dtype=RECORD_DTYPE, mode="r", offset=HEADER.size, shape=(self.count,))
+
+    def counts(self):
+        """Number of records per event name"""
+        events = np.bincount(self.array()["event"], minlength=len(EVENT_NAMES))
+        return {name: int(n) for name, n in zip(EVENT_NAMES, events)}
+
+    def close(self):
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,42 +1,82 @@
 from Node import Node
-import numpy as np
+from State import as_state, decode
 
 class Tree:
+    """Search tree indexed by state, so add() and find() are O(1).
+
+    Values are packed states (see State.py) or board arrays, which are
+    packed for the index. Traversals are iterative, so trees as deep as a
+    DFS run does not hit the recursion limit.
+    """
     def __init__(self, root_value):
         self.root = Node(root_value)
+        self.index = {self.key(root_value): self.root}
 
-    def add(self, parent_value, child_value):
-        parent_node = self.find(self.root, parent_value)
-        if parent_node:
-            parent_node.add_child(Node(child_value))
-        else:
+    @staticmethod
+    def key(value):
+        return as_state(value)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, value):
+        return self.key(value) in self.index
+
+    def add(self, parent_value, child_value, move=None):
+        """Attach child under parent; a child already in the tree is re-parented"""
+        parent_node = self.index.get(self.key(parent_value))
+        if parent_node is None:
             print(f"Parent not found!")
+            return None
+        key = self.key(child_value)
+        child_node = self.index.get(key)
+        if child_node is None:
+            child_node = self.index[key] = Node(child_value, move)
+        else:
+            if child_node.parent is not None:
+                child_node.parent.remove_child(child_node)
+            child_node.move = move
+        parent_node.add_child(child_node)
+        if child_node.children:
+            # Depths below a moved subtree shift with it
+            for node, _ in self.walk(child_node):
+                if node.parent is not None:
+                    node.depth = node.parent.depth + 1
+        return child_node
+
+    def find(self, node, value=None):
+        """Node holding value, or None. find(value) works too; the
+        starting node of the old recursive search is no longer needed."""
+        if value is None:
+            node, value = None, node
+        return self.index.get(self.key(value))
+
+    def path_to(self, value):
+        """Values from the root down to value"""
+        node = self.find(value)
+        path = []
+        while node is not None:
+            path.append(node.value)
+            node = node.parent
+        path.reverse()
+        return path
+
+    def walk(self, node=None):
+        """Yield (node, level) in depth-first preorder without recursion"""
+        stack = [(node or self.root, 0)]
+        while stack:
+            node, level = stack.pop()
+            yield node, level
+            stack.extend((child, level + 1) for child in reversed(node.children))
 
-    def find(self, node, value):
-        if np.array_equal(node.value, value):
-            return node
-        for child in node.children:
-            found = self.find(child, value)
-            if found:
-                return found
-        return None
-        
     def print_tree(self, node=None, level=0):
-        if node is None:
-            node = self.root
-        
-        indent = "  " * level
-        print(f"{indent}Level {level}:")
-        print(f"{indent}{node.value}")
-        
-        for child in node.children:
-            self.print_tree(child, level + 1)
+        for node, depth in self.walk(node):
+            indent = "  " * (level + depth)
+            value = decode(node.value) if isinstance(node.value, int) else node.value
+            print(f"{indent}Level {level + depth}:")
+            print(f"{indent}{value}")
     
     def count_tree_nodes(self, node=None):
         if node is None:
-            node = self.root
-        
-        count = 1
-        for child in node.children:
-            count += self.count_tree_nodes(child)
-        return count
\ No newline at end of file
+            return len(self.index)
+        return sum(1 for _ in self.walk(node))
@@ -1,27 +1,107 @@
+import sys
 import random
+import argparse
 import numpy as np
-def main():
-    # TODO : SELECT THE ALGORITHM 
-    # TODO : COMPUTE THE TIME OF ALGO 
+from Solvers import SOLVERS
+from Batch import solve_batch, read_puzzles, write_results, parse_puzzle, default_goal
+from State import get_board
+from BFS import layer_sizes
+import Benchmark
+from SolutionCache import SolutionCache
+from Progress import Budget
+def main(argv=None):
     # TODO : OUTPUT SHOULD BE SEND TO GUI
-    goal = [
-    [1, 2, 3],
-    [4, 5, 6],
-    [7, 8, 0]]
+    parser = argparse.ArgumentParser(description="Sliding puzzle solver")
+    commands = parser.add_subparsers(dest="command")
 
-    print(GenerateInput())
+    solve = commands.add_parser("solve", help="solve puzzles from a file or stdin, one per line, "
+                                              "and print one JSON result per line")
+    solve.add_argument("file", nargs="?", default="-", help="puzzle file, or - for stdin")
+    solve.add_argument("-a", "--algorithm", default="astar-manhattan", choices=sorted(SOLVERS))
+    solve.add_argument("-g", "--goal", help="goal board as n*n integers (default 1..n*n-1 then 0)")
+    solve.add_argument("-w", "--workers", type=int, help="worker processes (default: one per core)")
+    solve.add_argument("--cache", help="solution cache file (default: tables/solutions.sqlite)")
+    solve.add_argument("--no-cache", action="store_true", help="always solve, never read or store cached results")
+    solve.add_argument("--max-expansions", type=int, help="give up on a puzzle after this many expansions")
+    solve.add_argument("--max-frontier", type=int, help="give up once this many states wait in the frontier")
+    solve.add_argument("--max-closed", type=int, help="give up once this many states have been seen")
+    solve.add_argument("--max-memory", type=float, help="give up once a search has grown by this many MB")
+    solve.add_argument("--time-limit", type=float, help="give up on a puzzle after this many seconds")
 
+    generate = commands.add_parser("generate", help="print random solvable puzzles, one per line")
+    generate.add_argument("-n", "--count", type=int, default=1)
+    generate.add_argument("-s", "--size", type=int, default=3)
 
+    layers = commands.add_parser("layers", help="count states at each distance from a board, one line per layer")
+    layers.add_argument("board", nargs="?", help="board as n*n integers (default: the goal)")
+    layers.add_argument("-s", "--size", type=int, default=3, help="board width when no board is given")
+    layers.add_argument("-d", "--max-depth", type=int)
 
+    bench = commands.add_parser("bench", help="time algorithms on a seeded 8-puzzle corpus bucketed by optimal depth")
+    bench.add_argument("-a", "--algorithms", nargs="+", default=list(Benchmark.DEFAULT_ALGORITHMS),
+                       choices=sorted(SOLVERS), metavar="ALGORITHM")
+    bench.add_argument("-n", "--per-depth", type=int, default=2, help="instances per optimal depth")
+    bench.add_argument("--min-depth", type=int, default=0)
+    bench.add_argument("--max-depth", type=int, default=Benchmark.MAX_DEPTH)
+    bench.add_argument("--seed", type=int, default=0)
+    bench.add_argument("-t", "--trials", type=int, default=3, help="timed runs per instance")
+    bench.add_argument("-o", "--output", help="write results to a .json or .csv file")
+    bench.add_argument("-c", "--compare", help="baseline report to check for regressions")
+    bench.add_argument("--threshold", type=float, default=0.10,
+                       help="relative slowdown or memory growth counted as a regression")
+    bench.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run (much faster)")
+    bench.add_argument("--time-limit", type=float, default=Benchmark.TIME_LIMIT,
+                       help="seconds before a run is recorded as timed out (0 for no limit)")
+    bench.add_argument("-q", "--quiet", action="store_true", help="no per-instance log on stderr")
 
+    args = parser.parse_args(argv)
 
+    if args.command == "solve":
+        goal = parse_puzzle(args.goal) if args.goal else None
+        lines = sys.stdin if args.file == "-" else open(args.file)
+        cache = None if args.no_cache else SolutionCache(args.cache)
+        budget = None
+        if any(limit is not None for limit in (args.max_expansions, args.max_frontier, args.max_closed,
+                                               args.max_memory, args.time_limit)):
+            max_memory = None if args.max_memory is None else int(args.max_memory * 2 ** 20)
+            budget = Budget(max_expansions=args.max_expansions, max_frontier=args.max_frontier,
+                            max_closed=args.max_closed, max_memory=max_memory, time_limit=args.time_limit)
+        try:
+            with lines:
+                write_results(solve_batch(read_puzzles(lines), args.algorithm, goal, args.workers, cache=cache,
+                                          budget=budget))
+        finally:
+            if cache is not None:
+                cache.close()
+    elif args.command == "generate":
+        board = get_board(args.size)
+        goal = board.encode(default_goal(args.size))
+        printed = 0
+        while printed < args.count:
+            matrix = GenerateInput(args.size)
+            if board.solvable(board.encode(matrix), goal):
+                print(" ".join(str(v) for v in matrix.flatten()))
+                printed += 1
+    elif args.command == "layers":
+        matrix = parse_puzzle(args.board) if args.board else default_goal(args.size)
+        for depth, count in enumerate(layer_sizes(matrix, args.max_depth)):
+            print(depth, count)
+    elif args.command == "bench":
+        sys.exit(Benchmark.main(args))
+    else:
+        print(GenerateInput())
 
 
 
-def GenerateInput():
-    numbers = list(range(9))
+
+
+
+
+
+def GenerateInput(size=3):
+    numbers = list(range(size * size))
     random.shuffle(numbers)
-    matrix = np.array(numbers).reshape(3, 3)
+    matrix = np.array(numbers).reshape(size, size)
     return matrix
 
 if __name__ == "__main__":
@@ -0,0 +1,35 @@
+import pytest
+from ASTAR import AStar, manhattan_distance, ANYTIME_WEIGHT
+from Solvers import SOLVERS, WEIGHT
+from test_solvers import GOAL, assert_valid, optimal_cost, random_boards
+
+
+@pytest.mark.parametrize("name, weight", [("wastar-manhattan", WEIGHT), ("wastar-pdb", WEIGHT),
+                                          ("arastar-manhattan", ANYTIME_WEIGHT), ("arastar-pdb", ANYTIME_WEIGHT)])
+@pytest.mark.parametrize("matrix", random_boards(3, seed=1), ids=lambda m: "".join(map(str, m.flatten())))
+def test_suboptimal_solvers_stay_within_their_bound(name, weight, matrix):
+    # ARA* may stop at its time limit with only its first, weight-3 answer
+    solution = SOLVERS[name](matrix, GOAL)
+    assert_valid(solution, matrix)
+    assert optimal_cost(matrix) <= solution.cost <= weight * optimal_cost(matrix)
+
+
+@pytest.mark.parametrize("matrix", random_boards(3, seed=12), ids=lambda m: "".join(map(str, m.flatten())))
+def test_anytime_passes_tighten_until_optimal(matrix):
+    passes = []
+    solution = AStar(matrix, GOAL).solve_anytime(manhattan_distance,
+                                                 on_solution=lambda best, bound: passes.append((best.cost, bound)))
+    costs, bounds = zip(*passes)
+    assert list(costs) == sorted(costs, reverse=True)
+    assert list(bounds) == sorted(bounds, reverse=True) and bounds[-1] == 1
+    for cost, bound in passes:
+        assert cost <= bound * optimal_cost(matrix)
+    assert_valid(solution, matrix)
+    assert solution.cost == optimal_cost(matrix)
+
+
+def test_anytime_returns_its_first_answer_when_out_of_time():
+    matrix = random_boards(1, seed=13)[0]
+    solution = AStar(matrix, GOAL).solve_anytime(manhattan_distance, time_limit=0)
+    assert_valid(solution, matrix)
+    assert solution.cost <= ANYTIME_WEIGHT * optimal_cost(matrix)
@@ -0,0 +1,56 @@
+import io
+import json
+import pytest
+from Batch import parse_puzzle, read_puzzles, solve_batch, write_results
+from Progress import Budget
+from SolutionCache import SolutionCache
+from test_solvers import GOAL, optimal_cost, random_boards
+
+LINES = [" ".join(str(v) for v in matrix.flatten()) for matrix in random_boards(4, seed=17)]
+
+
+def test_parse_puzzle_accepts_spaces_and_commas():
+    assert parse_puzzle("1,2,3, 4 5 6 7 8 0").tolist() == [[1, 2, 3], [4, 5, 6], [7, 8, 0]]
+    for bad in ("1 2 3", "1 1 2 3", "0 1 2 3 4 5 6 7 9"):
+        with pytest.raises(ValueError):
+            parse_puzzle(bad)
+
+
+def test_read_puzzles_skips_blank_lines_and_comments():
+    assert list(read_puzzles(["# header\n", "\n", "1 2 3 0  # trailing\n"])) == ["1 2 3 0"]
+
+
+def test_results_come_back_in_order_with_errors_per_line():
+    swapped = "2 1 3 4 5 6 7 8 0"
+    puzzles = [LINES[0], "not a puzzle", LINES[1], "1 2 3 0", swapped, LINES[2]]
+    results = list(solve_batch(puzzles, "astar-manhattan", GOAL, workers=2, chunksize=1))
+    assert [r["index"] for r in results] == list(range(len(puzzles)))
+    # Unparsable, the wrong size for the goal, and unsolvable
+    assert [("error" in r) for r in results] == [False, True, False, True, True, False]
+    for result, line in zip([results[0], results[2], results[5]], LINES):
+        assert result["puzzle"] == [int(v) for v in line.split()]
+        assert result["solved"] and result["cost"] == optimal_cost(parse_puzzle(line))
+
+
+def test_without_a_goal_each_size_uses_its_own():
+    results = list(solve_batch(["1 2 3 0", LINES[0]], "astar-manhattan", workers=1))
+    assert [r["cost"] for r in results] == [0, optimal_cost(parse_puzzle(LINES[0]))]
+
+
+def test_cache_answers_repeats_but_not_exceeded_results():
+    cache = SolutionCache(":memory:")
+    first = list(solve_batch(LINES[:2], "astar-manhattan", workers=1, cache=cache))
+    again = list(solve_batch(LINES[:2], "astar-manhattan", workers=1, cache=cache))
+    assert all(r.get("cached") for r in again)
+    assert [r["moves"] for r in again] == [r["moves"] for r in first]
+
+    limited = list(solve_batch(LINES[2:], "bfs", workers=1, cache=cache, budget=Budget(max_expansions=10)))
+    assert all(r["exceeded"]["reason"] == "expansions" for r in limited)
+    assert not any(r.get("cached") for r in solve_batch(LINES[2:], "bfs", workers=1, cache=cache,
+                                                        budget=Budget(max_expansions=10)))
+
+
+def test_write_results_emits_json_lines():
+    out = io.StringIO()
+    write_results([{"index": 0}, {"index": 1}], out)
+    assert [json.loads(line) for line in out.getvalue().splitlines()] == [{"index": 0}, {"index": 1}]
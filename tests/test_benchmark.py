@@ -0,0 +1,20 @@
+import Benchmark
+from Batch import default_goal
+
+
+def test_runs_past_the_time_limit_are_recorded_as_timed_out():
+    (_, puzzle), = Benchmark.build_corpus(per_depth=1, depths=[31])
+    row = Benchmark.measure("ids", puzzle, default_goal(3), trials=3, memory=False, time_limit=0.05)
+    assert row["timed_out"] and row["cost"] is None
+    # A timed-out instance is not run again
+    assert row["time_min"] == row["time_median"]
+
+
+def test_compare_flags_new_time_outs_only():
+    (depth, puzzle), = Benchmark.build_corpus(per_depth=1, depths=[4])
+    finished = Benchmark.run_benchmark(["ids"], per_depth=1, depths=[depth], trials=1, memory=False)
+    timed_out = Benchmark.run_benchmark(["ids"], per_depth=1, depths=[depth], trials=1, memory=False,
+                                        time_limit=0)
+    assert timed_out["results"][0]["timed_out"]
+    assert Benchmark.compare(finished, timed_out)[1] == ["ids"]
+    assert Benchmark.compare(timed_out, timed_out)[1] == []
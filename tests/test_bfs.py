@@ -0,0 +1,31 @@
+import random
+import numpy as np
+from BFS import BFS
+from State import get_board
+from test_solvers import GOAL, assert_valid, optimal_cost, scrambled_boards
+
+
+def test_bidirectional_matches_bfs_with_fewer_expansions():
+    for matrix in scrambled_boards(3, 20, seed=9):
+        forward, both = BFS(matrix, GOAL).solve(), BFS(matrix, GOAL).solve_bidirectional()
+        assert_valid(both, matrix)
+        assert both.cost == forward.cost == optimal_cost(matrix)
+        assert both.nodes_expanded < forward.nodes_expanded
+
+
+def test_bidirectional_from_the_goal_costs_nothing():
+    solution = BFS(GOAL.copy(), GOAL).solve_bidirectional()
+    assert solution.solved and solution.cost == 0
+
+
+def test_bidirectional_on_a_15_puzzle():
+    board = get_board(4)
+    goal = np.append(np.arange(1, 16), 0).reshape(4, 4)
+    rng = random.Random(10)
+    state = board.encode(goal)
+    for _ in range(16):
+        state, _ = rng.choice(list(board.children(state)))
+    matrix = board.decode(state)
+    path, cost, nodes_expanded, depth = BFS(matrix, goal).Bidirectional_BFS_Algorithm()
+    assert cost == BFS(matrix, goal).solve().cost
+    assert np.array_equal(path[0], matrix) and np.array_equal(path[-1], goal)
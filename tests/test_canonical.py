@@ -0,0 +1,53 @@
+import random
+import pytest
+from BFS import BFS
+from Canonical import canonical
+from Solvers import SOLVERS
+from State import get_board
+
+
+def random_goal(size, blank, seed):
+    tiles = list(range(1, size * size))
+    random.Random(seed).shuffle(tiles)
+    tiles.insert(blank, 0)
+    return get_board(size).decode(get_board(size).encode(tiles))
+
+
+@pytest.mark.parametrize("size, blank", [(3, 0), (3, 4), (3, 5), (4, 6)])
+def test_mapping_is_a_move_preserving_bijection(size, blank):
+    board = get_board(size)
+    goal = random_goal(size, blank, seed=blank)
+    mapping = canonical(goal)
+    assert mapping.to_canonical(board.encode(goal)) == mapping.goal
+    rng = random.Random(size)
+    state = board.encode(goal)
+    for _ in range(200):
+        image = mapping.to_canonical(state)
+        assert mapping.from_canonical(image) == state
+        # Each move in the goal's frame is the mapped move in the canonical one
+        for child, move in board.children(state):
+            assert board.apply_move(image, mapping.move_map[move]) == mapping.to_canonical(child)
+        state, _ = rng.choice(list(board.children(state)))
+
+
+def test_goals_share_a_canonical_goal_by_the_blanks_orbit():
+    def canonical_goals(cells):
+        return {canonical(random_goal(3, cell, seed)).goal for cell in cells for seed in (0, 1)}
+    corners, edges, centre = canonical_goals([0, 2, 6, 8]), canonical_goals([1, 3, 5, 7]), canonical_goals([4])
+    assert len(corners) == len(edges) == len(centre) == 1
+    assert len(corners | edges | centre) == 3
+
+
+@pytest.mark.parametrize("blank", [0, 4, 7])
+def test_solutions_map_back_to_the_callers_goal(blank):
+    goal = random_goal(3, blank, seed=blank + 1)
+    board = get_board(3)
+    state = board.encode(goal)
+    rng = random.Random(blank)
+    for _ in range(30):
+        state, _ = rng.choice(list(board.children(state)))
+    matrix = board.decode(state)
+    solution = SOLVERS["astar-manhattan"](matrix, goal)
+    assert solution.start == state and solution.reached() == board.encode(goal)
+    # Plain BFS searches in the caller's frame
+    assert solution.cost == BFS(matrix, goal).solve().cost
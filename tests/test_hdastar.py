@@ -0,0 +1,51 @@
+import multiprocessing
+from collections import Counter
+import pytest
+from ASTAR import manhattan_distance
+from HDASTAR import HDAStar, owner
+from Solvers import SOLVERS
+from test_solvers import BOARD, GOAL, assert_valid, optimal_cost, random_boards, scrambled_boards
+
+
+@pytest.mark.parametrize("matrix", random_boards(3, seed=3), ids=lambda m: "".join(map(str, m.flatten())))
+def test_hdastar_with_two_workers_is_optimal(matrix):
+    solution = HDAStar(matrix, GOAL, workers=2).solve(manhattan_distance)
+    assert_valid(solution, matrix)
+    assert solution.cost == optimal_cost(matrix)
+
+
+def test_registered_hdastar_pdb_is_optimal():
+    matrix = random_boards(1, seed=14)[0]
+    solution = SOLVERS["hdastar-pdb"](matrix, GOAL)
+    assert_valid(solution, matrix)
+    assert solution.cost == optimal_cost(matrix)
+
+
+def test_owner_spreads_neighbouring_states():
+    states = [BOARD.encode(matrix) for matrix in scrambled_boards(400, 20, seed=15)]
+    shares = Counter(owner(state, 4) for state in states)
+    assert set(shares) == {0, 1, 2, 3}
+    assert min(shares.values()) > 50
+
+
+def workers_started(before):
+    return set(multiprocessing.active_children()) - before
+
+
+def test_trivial_boards_start_no_workers():
+    before = set(multiprocessing.active_children())
+    unsolvable = GOAL.copy()
+    unsolvable[0, 0], unsolvable[0, 1] = unsolvable[0, 1], unsolvable[0, 0]
+    assert not HDAStar(unsolvable, GOAL, workers=2).solve(manhattan_distance).solved
+    assert HDAStar(GOAL.copy(), GOAL, workers=2).solve(manhattan_distance).cost == 0
+    assert not workers_started(before)
+
+
+def test_closing_the_stream_stops_the_workers():
+    before = set(multiprocessing.active_children())
+    matrix = random_boards(1, seed=16)[0]
+    search = HDAStar(matrix, GOAL, workers=2).stream(manhattan_distance)
+    next(search)
+    assert len(workers_started(before)) == 2
+    search.close()
+    assert not workers_started(before)
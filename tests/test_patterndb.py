@@ -0,0 +1,23 @@
+import pytest
+import PatternDB
+from Solvers import SOLVERS, WEIGHT
+from test_solvers import BOARD, GOAL, GOAL_STATE, random_boards, optimal_cost
+
+BOARDS = random_boards(300, seed=8)
+
+
+def test_additive_pdb_is_admissible_and_consistent():
+    pdb = PatternDB.additive_pdb(GOAL_STATE)
+    for matrix in BOARDS:
+        state = BOARD.encode(matrix)
+        h = pdb(state)
+        assert h <= optimal_cost(matrix)
+        for child, _ in BOARD.children(state):
+            assert abs(pdb(child) - h) <= 1
+
+
+@pytest.mark.parametrize("name, weight", [("astar-pdb", 1), ("wastar-pdb", WEIGHT)])
+def test_pdb_searches_keep_their_bound_on_many_boards(name, weight):
+    for matrix in BOARDS:
+        cost = SOLVERS[name](matrix, GOAL).cost
+        assert optimal_cost(matrix) <= cost <= weight * optimal_cost(matrix)
@@ -0,0 +1,65 @@
+import random
+from collections import deque
+import pytest
+from State import get_board
+from Rank import BitSet, get_index
+
+
+def component(board, start):
+    """Every state reachable from start"""
+    seen = {start}
+    q = deque([start])
+    while q:
+        for child, _ in board.children(q.popleft()):
+            if child not in seen:
+                seen.add(child)
+                q.append(child)
+    return seen
+
+
+@pytest.mark.parametrize("size", [2, 3])
+def test_rank_is_a_bijection_on_each_parity_class(size):
+    board = get_board(size)
+    index = get_index(board)
+    states = component(board, board.goal)
+    assert len(states) == index.states
+    ranks = {index.rank(state) for state in states}
+    assert ranks == set(range(index.states))
+
+
+@pytest.mark.parametrize("size", [2, 3, 4])
+def test_unrank_inverts_rank(size):
+    board = get_board(size)
+    index = get_index(board)
+    rng = random.Random(size)
+    for _ in range(500):
+        tiles = list(range(board.cells))
+        rng.shuffle(tiles)
+        state = board.encode(tiles)
+        assert index.unrank(index.rank(state), board.parity(state)) == state
+
+
+def test_unrank_rejects_out_of_range_ranks():
+    index = get_index(get_board(3))
+    with pytest.raises(ValueError):
+        index.unrank(index.states)
+
+
+def test_bitset_counts_each_rank_once():
+    bits = BitSet(100)
+    for i in (0, 7, 8, 99, 7):
+        bits.add(i)
+    assert len(bits) == 4
+    assert [i for i in range(100) if i in bits] == [0, 7, 8, 99]
+
+
+def test_containers_are_dense_only_when_ranks_fit():
+    small, large = get_index(get_board(3)), get_index(get_board(4))
+    assert small.dense and not large.dense
+    assert isinstance(small.new_set(), BitSet) and isinstance(small.new_array(), bytearray)
+    assert len(small.new_array("I")) == small.states and not any(small.new_array("I"))
+    # Too many 15-puzzle ranks for flat storage: keyed by the packed state
+    board = get_board(4)
+    assert large.key(board.goal) == board.goal
+    assert isinstance(large.new_set(), set)
+    assert large.new_array()[board.goal] == 0
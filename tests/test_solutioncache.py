@@ -0,0 +1,80 @@
+import numpy as np
+from Canonical import canonical
+from SolutionCache import SolutionCache, record_of, replay
+from Solvers import SOLVERS
+from test_solvers import BOARD, GOAL, random_boards
+
+# A goal with the same canonical form as GOAL
+MIRRORED_GOAL = np.array([[0, 8, 7], [6, 5, 4], [3, 2, 1]])
+
+
+def in_frame(matrix, goal):
+    """The board playing the part of matrix when solving toward goal instead of GOAL"""
+    state = canonical(goal).from_canonical(canonical(GOAL).to_canonical(BOARD.encode(matrix)))
+    return BOARD.decode(state)
+
+
+def test_equivalent_goals_share_canonical_entries():
+    assert canonical(MIRRORED_GOAL).goal == canonical(GOAL).goal
+    cache = SolutionCache(":memory:")
+    matrix = random_boards(1, seed=7)[0]
+    cache.put(matrix, GOAL, "astar-manhattan", record_of(SOLVERS["astar-manhattan"](matrix, GOAL), 0.1))
+    mirrored = in_frame(matrix, MIRRORED_GOAL)
+    record = cache.get(mirrored, MIRRORED_GOAL, "astar-manhattan")
+    solution = replay(BOARD.encode(mirrored), record)
+    assert solution.reached() == BOARD.encode(MIRRORED_GOAL)
+
+
+def test_dfs_entries_stay_in_the_callers_frame():
+    cache = SolutionCache(":memory:")
+    matrix = random_boards(1, seed=7)[0]
+    solution = SOLVERS["dfs"](matrix, GOAL)
+    cache.put(matrix, GOAL, "dfs", record_of(solution, 0.1))
+    assert cache.get(in_frame(matrix, MIRRORED_GOAL), MIRRORED_GOAL, "dfs") is None
+    record = cache.get(matrix, GOAL, "dfs")
+    assert (record["cost"], record["nodes_expanded"]) == (solution.cost, solution.nodes_expanded)
+    assert replay(solution.start, record).moves == solution.moves
+
+
+def solved_records(count):
+    boards = random_boards(count, seed=18)
+    return [(matrix, record_of(SOLVERS["astar-manhattan"](matrix, GOAL), 0.1)) for matrix in boards]
+
+
+def test_records_persist_on_disk_across_instances(tmp_path):
+    path = str(tmp_path / "solutions.sqlite")
+    (matrix, record), = solved_records(1)
+    cache = SolutionCache(path)
+    cache.put(matrix, GOAL, "astar-manhattan", record)
+    cache.close()
+
+    reopened = SolutionCache(path)
+    assert reopened.get(matrix, GOAL, "astar-manhattan") == record
+    assert reopened.get(matrix, GOAL, "bfs") is None
+    reopened.close()
+
+
+def test_both_tiers_drop_the_least_recently_used(tmp_path):
+    path = str(tmp_path / "solutions.sqlite")
+    entries = solved_records(4)
+    cache = SolutionCache(path, memory_size=2, disk_size=3)
+    for matrix, record in entries:
+        cache.put(matrix, GOAL, "astar-manhattan", record)
+    assert len(cache.memory) == 2
+    # The oldest entry comes back from disk and becomes the most recent
+    assert cache.get(entries[0][0], GOAL, "astar-manhattan") == entries[0][1]
+    cache.close()
+
+    reopened = SolutionCache(path)
+    hits = [reopened.get(matrix, GOAL, "astar-manhattan") is not None for matrix, _ in entries]
+    assert hits == [True, False, True, True]
+    reopened.close()
+
+
+def test_replay_rebuilds_the_solution():
+    (matrix, record), = solved_records(1)
+    solution = replay(BOARD.encode(matrix), record)
+    assert solution.solved and solution.cost == record["cost"]
+    assert solution.reached() == BOARD.encode(GOAL)
+    unsolved = replay(BOARD.encode(matrix), dict(record, solved=False))
+    assert not unsolved.solved and unsolved.nodes_expanded == record["nodes_expanded"]
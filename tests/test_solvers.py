@@ -0,0 +1,118 @@
+import random
+import time
+import pytest
+import DistanceTable
+from Batch import default_goal
+from ASTAR import AStar, manhattan_distance
+from BFS import BFS
+from Progress import Budget, BudgetExceeded, SearchStats
+from Rank import get_index
+from Solvers import SOLVERS, STREAMS
+from State import get_board
+from Stream import finish
+
+GOAL = default_goal(3)
+BOARD = get_board(3)
+GOAL_STATE = BOARD.encode(GOAL)
+
+# Solvers that return optimal paths quickly enough for any 8-puzzle
+OPTIMAL = ["bidirectional-bfs", "layered-bfs", "astar-manhattan", "astar-exact", "astar-pdb",
+           "idastar-euclidean", "idastar-pdb", "table"]
+# Optimal, but only fast on boards close to the goal
+OPTIMAL_SHALLOW = ["bfs", "ids", "astar-euclidean", "idastar-manhattan"]
+
+
+def random_boards(count, seed=0):
+    """Uniformly random solvable boards, sampled by rank"""
+    index = get_index(BOARD)
+    rng = random.Random(seed)
+    parity = BOARD.parity(GOAL_STATE)
+    return [BOARD.decode(index.unrank(rng.randrange(index.states), parity)) for _ in range(count)]
+
+
+def scrambled_boards(count, moves, seed=0):
+    """Boards a random walk of `moves` steps away from the goal"""
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(count):
+        state = GOAL_STATE
+        for _ in range(moves):
+            state, _ = rng.choice(list(BOARD.children(state)))
+        boards.append(BOARD.decode(state))
+    return boards
+
+
+def optimal_cost(matrix):
+    return DistanceTable.load(GOAL).distance(matrix)
+
+
+def assert_valid(solution, matrix):
+    assert solution.solved
+    assert solution.start == BOARD.encode(matrix)
+    assert solution.reached() == GOAL_STATE
+
+
+@pytest.mark.parametrize("name", OPTIMAL)
+@pytest.mark.parametrize("matrix", random_boards(4), ids=lambda m: "".join(map(str, m.flatten())))
+def test_optimal_solvers_match_the_distance_table(name, matrix):
+    solution = SOLVERS[name](matrix, GOAL)
+    assert_valid(solution, matrix)
+    assert solution.cost == optimal_cost(matrix)
+
+
+@pytest.mark.parametrize("name", OPTIMAL_SHALLOW)
+@pytest.mark.parametrize("matrix", scrambled_boards(3, 14), ids=lambda m: "".join(map(str, m.flatten())))
+def test_shallow_optimal_solvers_match_the_distance_table(name, matrix):
+    solution = SOLVERS[name](matrix, GOAL)
+    assert_valid(solution, matrix)
+    assert solution.cost == optimal_cost(matrix)
+
+
+def test_dfs_returns_a_valid_path():
+    matrix = random_boards(1, seed=2)[0]
+    assert_valid(SOLVERS["dfs"](matrix, GOAL), matrix)
+
+
+def test_every_solver_reports_unsolvable_boards():
+    matrix = GOAL.copy()
+    matrix[0, 0], matrix[0, 1] = matrix[0, 1], matrix[0, 0]
+    for name in ["bfs", "bidirectional-bfs", "layered-bfs", "ids", "astar-manhattan", "idastar-manhattan",
+                 "table"]:
+        assert not SOLVERS[name](matrix, GOAL).solved, name
+
+
+@pytest.mark.parametrize("name", ["bfs", "bidirectional-bfs", "layered-bfs", "dfs", "astar-manhattan"])
+def test_closed_budget_stops_the_search(name):
+    matrix = random_boards(1, seed=4)[0]
+    solution = SOLVERS[name](matrix, GOAL, budget=Budget(max_closed=50))
+    assert solution.exceeded["reason"] == "closed"
+    assert solution.exceeded["stats"]["closed"] > 50
+
+
+def test_time_limit_starts_on_the_first_next():
+    matrix = scrambled_boards(1, 14, seed=5)[0]
+    search = STREAMS["astar-manhattan"](matrix, GOAL, budget=Budget(time_limit=0.1))
+    time.sleep(0.2)
+    solution = finish(search)
+    assert solution.exceeded is None
+    assert_valid(solution, matrix)
+
+
+def test_table_builds_count_against_the_time_limit():
+    stats = SearchStats(budget=Budget(time_limit=0))
+    stats.start()
+    time.sleep(0.01)
+    with pytest.raises(BudgetExceeded) as exceeded:
+        stats.check()
+    assert exceeded.value.reason == "time"
+
+
+def test_bfs_and_astar_can_be_solved_twice():
+    matrix = scrambled_boards(1, 12, seed=6)[0]
+    bfs = BFS(matrix, GOAL)
+    astar = AStar(matrix, GOAL)
+    first = bfs.solve(), astar.solve(manhattan_distance)
+    second = bfs.solve(), astar.solve(manhattan_distance)
+    for solution in first + second:
+        assert_valid(solution, matrix)
+    assert [s.cost for s in first] == [s.cost for s in second]
@@ -0,0 +1,59 @@
+import asyncio
+import inspect
+from Solution import Solution
+from Solvers import STREAMS
+from Stream import advance, finish, solve_async, time_share
+from test_solvers import GOAL, assert_valid, optimal_cost, scrambled_boards
+
+NEAR, FAR = scrambled_boards(1, 4, seed=20)[0], scrambled_boards(1, 40, seed=21)[0]
+
+
+def test_nothing_runs_until_the_first_next():
+    search = STREAMS["bfs"](FAR, GOAL)
+    assert inspect.getgeneratorstate(search) == inspect.GEN_CREATED
+    search.close()
+
+
+def test_events_are_expanded_states_then_the_solution():
+    events = list(STREAMS["astar-manhattan"](NEAR, GOAL))
+    solution = events[-1]
+    assert isinstance(solution, Solution) and all(isinstance(e, int) for e in events[:-1])
+    assert len(events) - 1 == solution.nodes_expanded
+    assert finish(STREAMS["astar-manhattan"](NEAR, GOAL)).moves == solution.moves
+
+
+def test_advance_runs_a_slice_at_a_time():
+    search = STREAMS["bfs"](FAR, GOAL)
+    assert advance(search, 10) is None
+    solution = None
+    while solution is None:
+        solution = advance(search)
+    assert_valid(solution, FAR)
+    assert solution.cost == optimal_cost(FAR)
+
+
+def test_time_share_finishes_the_cheap_search_first_and_closes_the_rest():
+    searches = {"far": STREAMS["bfs"](FAR, GOAL), "near": STREAMS["bfs"](NEAR, GOAL)}
+    shared = time_share(searches, steps=50)
+    key, solution = next(shared)
+    assert key == "near" and solution.cost == optimal_cost(NEAR)
+    shared.close()
+    assert inspect.getgeneratorstate(searches["far"]) == inspect.GEN_CLOSED
+
+
+def test_solve_async_solves_and_closes_on_cancel():
+    async def run():
+        solution = await solve_async(STREAMS["astar-manhattan"](FAR, GOAL), steps=100)
+        slow = STREAMS["bfs"](FAR, GOAL)
+        task = asyncio.ensure_future(solve_async(slow, steps=10))
+        await asyncio.sleep(0)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return solution, slow
+
+    solution, slow = asyncio.run(run())
+    assert solution.cost == optimal_cost(FAR)
+    assert inspect.getgeneratorstate(slow) == inspect.GEN_CLOSED
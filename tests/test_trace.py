@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from Batch import default_goal
+from BFS import BFS
+from IDASTAR import IDAStar
+from ASTAR import manhattan_distance, euclidean_distance
+from Rank import get_index
+from State import get_board
+from Trace import TraceReader, TraceWriter, EXPAND, GENERATE, GOAL, BOUND, INITIAL_RECORDS
+
+START = np.array([[1, 2, 3], [4, 0, 6], [7, 5, 8]])
+
+
+def test_records_read_back_as_written(tmp_path):
+    board = get_board(3)
+    start, goal = board.encode(START), board.encode(default_goal(3))
+    child, _ = next(board.children(start))
+    with TraceWriter(str(tmp_path / "manual.trace")) as trace:
+        trace.begin(start, goal)
+        trace.record(EXPAND, start)
+        trace.record(GENERATE, child, start, 1, 2.5)
+
+    with TraceReader(str(tmp_path / "manual.trace")) as reader:
+        assert len(reader) == 2
+        assert (reader.start, reader.goal) == (start, goal)
+        expand, generate = reader[0], reader[1]
+        assert reader.state(expand.state) == start and reader.state(expand.parent) is None
+        assert expand.event == EXPAND
+        assert reader.state(generate.state) == child and reader.state(generate.parent) == start
+        assert (generate.g, generate.h, generate.event) == (1, 2.5, GENERATE)
+        assert list(reader) == [reader[0], reader[-1]]
+
+
+def test_bfs_trace_matches_the_search(tmp_path):
+    path = str(tmp_path / "bfs.trace")
+    with TraceWriter(path) as trace:
+        search = BFS(START, default_goal(3), trace=trace)
+        solution = search.solve()
+
+    with TraceReader(path) as reader:
+        counts = reader.counts()
+        assert counts["expand"] == solution.nodes_expanded
+        assert counts["goal"] == 1
+        assert list(reader.expansions())[0] == solution.start
+        array = reader.array()
+        assert len(array) == len(reader)
+        assert array["event"][-1] == GOAL
+        # Streaming in small chunks yields the same records as the memmap
+        assert [r.state for r in reader.records(chunk=3)] == array["state"].tolist()
+
+
+def test_idastar_records_each_bound(tmp_path):
+    path = str(tmp_path / "idastar.trace")
+    with TraceWriter(path) as trace:
+        solution = IDAStar(START, default_goal(3), trace=trace).solve(manhattan_distance)
+
+    with TraceReader(path) as reader:
+        bounds = [record.h for record in reader.records(event=BOUND)]
+        assert bounds == sorted(bounds)
+        assert bounds[-1] == solution.cost
+
+
+def test_idastar_bounds_are_whole_moves_for_euclidean(tmp_path):
+    path = str(tmp_path / "euclidean.trace")
+    with TraceWriter(path) as trace:
+        solution = IDAStar(START, default_goal(3), trace=trace).solve(euclidean_distance)
+
+    with TraceReader(path) as reader:
+        bounds = [record.h for record in reader.records(event=BOUND)]
+        assert all(bound == int(bound) for bound in bounds)
+        assert bounds[-1] == solution.cost
+
+
+def test_trace_grows_past_its_initial_capacity(tmp_path):
+    board = get_board(4)
+    start = board.goal
+    child, _ = next(board.children(start))
+    path = str(tmp_path / "long.trace")
+    with TraceWriter(path) as trace:
+        trace.begin(start, start)
+        for i in range(INITIAL_RECORDS + 10):
+            trace.record(EXPAND, child if i % 2 else start, g=i)
+
+    with TraceReader(path) as reader:
+        assert len(reader) == INITIAL_RECORDS + 10
+        assert reader[-1].g == INITIAL_RECORDS + 9
+        # 15-puzzle states fill all 64 stored bits and still read back
+        assert reader.state(reader[-1].state) == child
+        assert reader.rank(reader[0].state) == get_index(board).rank(start)
+
+
+def test_reader_rejects_other_files(tmp_path):
+    path = tmp_path / "not.trace"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        TraceReader(str(path))
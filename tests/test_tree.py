@@ -0,0 +1,38 @@
+from BFS import BFS
+from Tree import Tree
+from test_solvers import BOARD, GOAL, GOAL_STATE, scrambled_boards
+
+
+def test_boards_and_packed_states_index_the_same_node():
+    tree = Tree(GOAL)
+    child, move = next(BOARD.children(GOAL_STATE))
+    node = tree.add(GOAL_STATE, BOARD.decode(child), move)
+    assert child in tree and BOARD.decode(child) in tree
+    assert tree.find(child) is node and node.move == move and node.depth == 1
+    assert len(tree) == tree.count_tree_nodes() == 2
+
+
+def test_reparenting_moves_the_subtree_and_its_depths():
+    tree = Tree(0)
+    for parent, child in [(0, 1), (1, 2), (2, 3), (0, 4)]:
+        tree.add(parent, child)
+    tree.add(4, 1)
+    assert tree.path_to(3) == [0, 4, 1, 2, 3]
+    assert [tree.find(v).depth for v in (1, 2, 3)] == [2, 3, 4]
+    assert [node.value for node in tree.root.children] == [4]
+
+
+def test_deep_trees_walk_without_recursion():
+    tree = Tree(0)
+    for value in range(1, 5000):
+        tree.add(value - 1, value)
+    assert [level for _, level in tree.walk()][-1] == 4999
+    assert tree.count_tree_nodes(tree.find(4990)) == 10
+
+
+def test_recorded_search_tree_holds_the_solution_path():
+    matrix = scrambled_boards(1, 10, seed=19)[0]
+    search = BFS(matrix, GOAL, record_tree=True)
+    solution = search.solve()
+    path = search.tree.path_to(GOAL_STATE)
+    assert path[0] == solution.start and len(path) == solution.cost + 1